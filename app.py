@@ -4,11 +4,18 @@ Continuously running backend for GitHub repository management.
 Supports multi-repository management and personalized AI responses.
 """
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
+from flask_limiter import Limiter
+from werkzeug.exceptions import HTTPException
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import orjson
 import sys
 import os
 
 from src.config import Config
 from src.logger import setup_logger
+from src.cache import ttl_cache
 from src.github_client import GitHubClient
 from src.ai_service import AIService
 from src.email_service import EmailService
@@ -19,8 +26,43 @@ from src.webhook_handler import WebhookHandler
 # Setup logger
 logger = setup_logger(__name__)
 
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson for faster encoding and parsing."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # orjson already produces bytes, so skip the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS),
+            mimetype="application/json"
+        )
+
+
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+
+# GitHub caps webhook payloads at 25 MB; anything larger is rejected with a
+# 413 before the body is buffered or hashed
+app.config['MAX_CONTENT_LENGTH'] = 25 * 1024 * 1024
+
+# Sheds redelivery loops and misconfigured hooks with a cheap 429 before
+# any GitHub or AI work is done; only routes that opt in are limited.
+# Anyone can send an X-GitHub-Hook-ID header, so only requests that pass
+# signature verification count against a hook's budget (see webhook())
+limiter = Limiter(
+    key_func=lambda: request.headers.get('X-GitHub-Hook-ID', 'global'),
+    app=app,
+    default_limits=[],
+    storage_uri=Config.RATE_LIMIT_STORAGE_URI
+)
 
 # Global instances
 github_client = None
@@ -33,10 +75,14 @@ initialization_error = None
 
 
 def initialize_services():
-    """Initialize all services and validate configuration."""
+    """Initialize all services and validate configuration.
+    Safe to call again: services own background threads, so they are built once."""
     global github_client, ai_service, email_service
     global issue_manager, pr_manager, webhook_handler, initialization_error
 
+    if webhook_handler is not None:
+        return
+
     try:
         # Validate configuration
         is_valid, errors = Config.validate()
@@ -58,9 +104,14 @@ def initialize_services():
         # Initialize services
         logger.info("Initializing services...")
         
-        github_client = GitHubClient()
-        ai_service = AIService()
-        email_service = EmailService()
+        # Service constructors are independent network handshakes; run them together
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            github_future = executor.submit(GitHubClient)
+            ai_future = executor.submit(AIService)
+            email_future = executor.submit(EmailService)
+            github_client = github_future.result()
+            ai_service = ai_future.result()
+            email_service = email_future.result()
         
         issue_manager = IssueManager(github_client, ai_service, email_service)
         pr_manager = PRManager(github_client, ai_service, email_service)
@@ -68,13 +119,15 @@ def initialize_services():
         
         logger.info("All services initialized successfully")
 
-        # Log user info
+        # Both go through the same GitHub client, which serves one request at a time
         user_info = github_client.get_user_info()
+        repos = github_client.get_all_public_repositories()
+
+        # Log user info
         logger.info(f"Authenticated as: {user_info.get('login')}")
         logger.info(f"Public repositories: {user_info.get('public_repos')}")
 
         # Log public repositories
-        repos = github_client.get_all_public_repositories()
         logger.info(f"Managing {len(repos)} public repositories:")
         for repo in repos[:5]:  # Log first 5
             logger.info(f"  - {repo.full_name}")
@@ -93,48 +146,99 @@ def initialize_services():
 # Initialize services at module level (for Gunicorn)
 initialize_services()
 
+# Status fields that never change at runtime, computed once
+app.config['STATIC_STATUS'] = {
+    'service': 'GitHub Manager',
+    'version': '2.0.0',
+    'ai_provider': Config.AI_PROVIDER,
+    'ai_model': Config.OPENAI_MODEL if Config.AI_PROVIDER == 'openai' else Config.GEMINI_MODEL,
+    'email_enabled': Config.has_email_configured(),
+    'features': {
+        'multi_repo': True,
+        'personalized_responses': True,
+        'custom_system_prompt': bool(os.getenv('SYSTEM_PROMPT'))
+    }
+}
+app.config['STATIC_HEALTH'] = {
+    key: app.config['STATIC_STATUS'][key]
+    for key in ('ai_provider', 'ai_model', 'email_enabled')
+}
+# Folded into status ETags so a config change (provider, model, email) invalidates them;
+# STATIC_HEALTH is a subset of STATIC_STATUS, so one digest covers both
+app.config['STATIC_DIGEST'] = hashlib.md5(
+    orjson.dumps(app.config['STATIC_STATUS'], option=orjson.OPT_SORT_KEYS)
+).hexdigest()
+
+@ttl_cache(60)
+def cached_user_info():
+    """Authenticated user info, refreshed at most once a minute."""
+    return github_client.get_user_info() if github_client else {}
+
+
+@ttl_cache(300)
+def cached_repos():
+    """Public repositories, refreshed at most every 5 minutes."""
+    return github_client.get_all_public_repositories() if github_client else []
+
+
+def cacheable_status(response, user_login: str, repo_count: int):
+    """
+    Let monitors and proxies cache a status response and revalidate with 304s.
+
+    Args:
+        response: Response to decorate
+        user_login: Authenticated user login shown in the response
+        repo_count: Number of managed repositories shown in the response
+
+    Returns:
+        The response, or an empty 304 if the client's ETag still matches
+    """
+    etag = hashlib.md5(
+        f"{app.config['STATIC_DIGEST']}:{user_login}:{repo_count}".encode()
+    ).hexdigest()[:16]
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = 30
+    return response.make_conditional(request)
+
 
 @app.route('/')
 def index():
     """Health check endpoint."""
-    user_info = github_client.get_user_info() if github_client else {}
-    repos = github_client.get_all_public_repositories() if github_client else []
+    user_info = cached_user_info()
+    repos = cached_repos()
+    user_login = user_info.get('login', 'unknown')
 
-    return jsonify({
+    response = jsonify({
+        **app.config['STATIC_STATUS'],
         'status': 'running',
-        'service': 'GitHub Manager',
-        'version': '2.0.0',
-        'authenticated_user': user_info.get('login', 'unknown'),
-        'managing_repositories': len(repos),
-        'ai_provider': Config.AI_PROVIDER,
-        'ai_model': Config.OPENAI_MODEL if Config.AI_PROVIDER == 'openai' else Config.GEMINI_MODEL,
-        'email_enabled': Config.has_email_configured(),
-        'features': {
-            'multi_repo': True,
-            'personalized_responses': True,
-            'custom_system_prompt': bool(os.getenv('SYSTEM_PROMPT'))
-        }
+        'authenticated_user': user_login,
+        'managing_repositories': len(repos)
     })
+    return cacheable_status(response, user_login, len(repos))
 
 
 @app.route('/health')
 def health():
     """Detailed health check endpoint."""
     try:
+        if not github_client:
+            raise RuntimeError(initialization_error or "Services not initialized")
+
         # Check GitHub connection
-        user_info = github_client.get_user_info()
-        repos = github_client.get_all_public_repositories()
+        user_info = cached_user_info()
+        repos = cached_repos()
         github_status = 'connected' if user_info else 'disconnected'
+        user_login = user_info.get('login', 'unknown')
 
-        return jsonify({
+        response = jsonify({
+            **app.config['STATIC_HEALTH'],
             'status': 'healthy',
             'github': github_status,
-            'authenticated_user': user_info.get('login', 'unknown'),
-            'managing_repositories': len(repos),
-            'ai_provider': Config.AI_PROVIDER,
-            'ai_model': Config.OPENAI_MODEL if Config.AI_PROVIDER == 'openai' else Config.GEMINI_MODEL,
-            'email_enabled': Config.has_email_configured()
+            'authenticated_user': user_login,
+            'managing_repositories': len(repos)
         })
+        return cacheable_status(response, user_login, len(repos))
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return jsonify({
@@ -143,7 +247,13 @@ def health():
         }), 500
 
 
+def is_signed_delivery(response) -> bool:
+    """Whether a webhook response is for a request that passed signature verification."""
+    return response.status_code != 401
+
+
 @app.route('/webhook', methods=['POST'])
+@limiter.limit(Config.WEBHOOK_RATE_LIMIT, deduct_when=is_signed_delivery)
 def webhook():
     """GitHub webhook endpoint."""
     try:
@@ -152,30 +262,55 @@ def webhook():
             logger.warning("Webhook signature verification failed")
             return jsonify({'error': 'Invalid signature'}), 401
         
+        # GitHub redelivers on timeouts and errors; handle each delivery once
+        delivery_id = request.headers.get('X-GitHub-Delivery')
+        if delivery_id and webhook_handler.is_duplicate_delivery(delivery_id):
+            logger.info(f"Ignoring duplicate delivery: {delivery_id}")
+            return jsonify({'status': 'duplicate'}), 200
+
         # Get event type
         event_type = request.headers.get('X-GitHub-Event')
         
         if not event_type:
             logger.warning("No event type in webhook request")
             return jsonify({'error': 'No event type'}), 400
+
+        # Repository created/deleted/renamed: refresh the cached repo list
+        if event_type == 'repository':
+            cached_repos.cache_clear()
+
+        # Drop unhandled events (push, star, ping, ...) before parsing the payload
+        if event_type not in WebhookHandler.HANDLED_EVENTS:
+            logger.debug(f"No handler for event type: {event_type}")
+            return jsonify({'status': 'ignored'}), 200
         
         # Get payload
-        payload = request.json
+        payload = request.get_json(cache=False)
         
         if not payload:
             logger.warning("No payload in webhook request")
             return jsonify({'error': 'No payload'}), 400
         
-        # Handle event
-        success = webhook_handler.handle_event(event_type, payload)
-        
-        if success:
-            return jsonify({'status': 'processed'}), 200
+        # Queue the event; it is processed in the background after the response
+        if webhook_handler.handle_event(event_type, payload):
+            return jsonify({'status': 'queued'}), 202
         else:
-            return jsonify({'status': 'ignored'}), 200
+            # Let a redelivery through once there is room again
+            if delivery_id:
+                webhook_handler.forget_delivery(delivery_id)
+            return jsonify({'error': 'Webhook queue full'}), 503
+
+    except HTTPException:
+        # Client errors such as an oversized body (413) go to their errorhandler
+        raise
     
     except Exception as e:
         logger.error(f"Error processing webhook: {e}")
+
+        # The delivery failed, so a redelivery must not be dropped as a duplicate
+        delivery_id = request.headers.get('X-GitHub-Delivery')
+        if delivery_id and webhook_handler:
+            webhook_handler.forget_delivery(delivery_id)
         
         # Send error notification
         if email_service:
@@ -193,6 +328,20 @@ def not_found(e):
     return jsonify({'error': 'Not found'}), 404
 
 
+@app.errorhandler(413)
+def payload_too_large(e):
+    """Handle request bodies over MAX_CONTENT_LENGTH."""
+    logger.warning(f"Rejected oversized request: {request.content_length} bytes")
+    return jsonify({'error': 'Payload too large'}), 413
+
+
+@app.errorhandler(429)
+def rate_limited(e):
+    """Handle rate-limited requests."""
+    logger.warning(f"Rate limit exceeded for hook {request.headers.get('X-GitHub-Hook-ID', 'unknown')}: {e.description}")
+    return jsonify({'error': 'Too many requests'}), 429
+
+
 @app.errorhandler(500)
 def internal_error(e):
     """Handle 500 errors."""
@@ -201,9 +350,7 @@ def internal_error(e):
 
 
 if __name__ == '__main__':
-    # Initialize services on startup
-    initialize_services()
-    
+    # Services were initialized at import
     # Run Flask app
     port = Config.PORT
     logger.info(f"Starting GitHub Manager on port {port}")
@@ -12,13 +12,151 @@ Environment Variables Required:
     WEBHOOK_URL - Your Heroku app webhook URL
 """
 
+import json
 import os
 import sys
-from github import Github
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from github import Github, GithubRetry
 from github.GithubException import GithubException
 
+# Number of repositories processed in parallel
+MAX_CONCURRENT_REPOS = 10
 
-def setup_webhooks():
+# Pause all workers when fewer API requests than this remain
+RATE_LIMIT_THRESHOLD = 50
+
+# Repositories confirmed to have the webhook are not re-checked for a day
+HOOK_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'github-manager', 'hooks.json')
+HOOK_CACHE_TTL = 24 * 60 * 60
+
+
+def load_hook_cache():
+    """Load the {repo_full_name: {webhook_url: checked_at}} cache from disk."""
+    try:
+        with open(HOOK_CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_hook_cache(cache):
+    """Write the hook cache to disk, ignoring failures."""
+    try:
+        os.makedirs(os.path.dirname(HOOK_CACHE_PATH), exist_ok=True)
+        with open(HOOK_CACHE_PATH, 'w') as f:
+            json.dump(cache, f)
+    except OSError as e:
+        print(f"⚠️  Could not save hook cache: {e}")
+
+
+def is_hook_cached(cache, repo_name, webhook_url):
+    """Check whether the webhook was confirmed on the repository recently."""
+    checked_at = cache.get(repo_name, {}).get(webhook_url)
+    return checked_at is not None and time.time() - checked_at < HOOK_CACHE_TTL
+
+
+class RateLimitGovernor:
+    """Pauses every worker together when the token's rate limit runs low."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def wait(self, github_client):
+        """
+        Block until the rate limit has headroom.
+
+        Uses the X-RateLimit-* headers of the worker's last response, so no
+        extra request is made. The limit belongs to the token, so any client's
+        view of it applies to all of them. The lock is held while sleeping,
+        which makes every other worker wait for the same reset.
+        """
+        with self._lock:
+            remaining, limit = github_client.rate_limiting
+            if remaining >= RATE_LIMIT_THRESHOLD:
+                return
+
+            wait_seconds = github_client.rate_limiting_resettime - time.time() + 1
+            if wait_seconds > 0:
+                print(f"\n⏳ Rate limit low ({remaining}/{limit} left), "
+                      f"pausing {wait_seconds:.0f}s until reset...")
+                time.sleep(wait_seconds)
+
+
+def create_github_client(github_token):
+    """
+    Create a GitHub client for one thread of bulk operations.
+
+    A PyGithub client keeps its in-flight connection on the shared Requester,
+    so it must not be used from several threads; each worker builds its own.
+    The fixed delay between reads is disabled since every client only makes
+    one request at a time. Writes keep PyGithub's default spacing to stay
+    clear of secondary rate limits. Rate-limited and failed requests are
+    retried at most 3 times, honoring Retry-After and X-RateLimit-Reset.
+    """
+    return Github(
+        github_token,
+        per_page=100,
+        seconds_between_requests=None,
+        retry=GithubRetry(total=3, backoff_factor=1)
+    )
+
+
+def map_repos(github_token, func, repos):
+    """
+    Apply func to every repository concurrently, yielding results in order.
+
+    Each worker thread gets its own client, and func receives the repository
+    re-bound to that client so no connection is shared between threads.
+    """
+    governor = RateLimitGovernor()
+    local = threading.local()
+
+    def governed(repo):
+        if not hasattr(local, 'client'):
+            local.client = create_github_client(github_token)
+        governor.wait(local.client)
+        return func(local.client.get_repo(repo.full_name, lazy=True))
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REPOS) as executor:
+        yield from executor.map(governed, repos)
+
+
+def add_webhook(repo, webhook_url, webhook_config, events):
+    """
+    Add the webhook to a repository unless it already exists.
+
+    Returns:
+        Tuple of (outcome, message) where outcome is 'added', 'skipped' or 'error'
+    """
+    try:
+        # Check if webhook already exists
+        for hook in repo.get_hooks():
+            if hook.config.get('url') == webhook_url:
+                return 'skipped', "⏭️  Already exists"
+
+        # Create webhook
+        repo.create_hook(
+            name="web",
+            config=webhook_config,
+            events=events,
+            active=True
+        )
+        return 'added', "✅ Added"
+
+    except GithubException as e:
+        if e.status == 403:
+            return 'error', "❌ Permission denied (need admin access)"
+        elif e.status == 404:
+            return 'error', "❌ Repository not found"
+        else:
+            return 'error', f"❌ Error: {e.data.get('message', str(e))}"
+    except Exception as e:
+        return 'error', f"❌ Unexpected error: {e}"
+
+
+def setup_webhooks(use_cache=True):
     """Add webhooks to all public repositories."""
     
     # Get configuration from environment
@@ -44,7 +182,7 @@ def setup_webhooks():
     
     # Initialize GitHub client
     try:
-        g = Github(github_token)
+        g = create_github_client(github_token)
         user = g.get_user()
         print(f"✅ Authenticated as: {user.login}")
         print()
@@ -66,7 +204,8 @@ def setup_webhooks():
         "issue_comment",
         "pull_request",
         "pull_request_review",
-        "pull_request_review_comment"
+        "pull_request_review_comment",
+        "repository"
     ]
     
     # Get all public repositories
@@ -95,44 +234,29 @@ def setup_webhooks():
     skip_count = 0
     error_count = 0
     
-    for i, repo in enumerate(repos, 1):
-        repo_name = repo.full_name
-        print(f"[{i}/{len(repos)}] {repo_name}...", end=" ")
+    hook_cache = load_hook_cache() if use_cache else {}
+    
+    def process(repo):
+        if is_hook_cached(hook_cache, repo.full_name, webhook_url):
+            return 'skipped', "⏭️  Already exists (checked recently)"
+        return add_webhook(repo, webhook_url, webhook_config, events)
+    
+    results = map_repos(github_token, process, repos)
+    
+    for i, (repo, (outcome, message)) in enumerate(zip(repos, results), 1):
+        print(f"[{i}/{len(repos)}] {repo.full_name}... {message}")
         
-        try:
-            # Check if webhook already exists
-            existing_webhooks = repo.get_hooks()
-            webhook_exists = False
-            
-            for hook in existing_webhooks:
-                if hook.config.get('url') == webhook_url:
-                    webhook_exists = True
-                    print("⏭️  Already exists")
-                    skip_count += 1
-                    break
-            
-            if not webhook_exists:
-                # Create webhook
-                repo.create_hook(
-                    name="web",
-                    config=webhook_config,
-                    events=events,
-                    active=True
-                )
-                print("✅ Added")
-                success_count += 1
-                
-        except GithubException as e:
-            if e.status == 403:
-                print(f"❌ Permission denied (need admin access)")
-            elif e.status == 404:
-                print(f"❌ Repository not found")
-            else:
-                print(f"❌ Error: {e.data.get('message', str(e))}")
-            error_count += 1
-        except Exception as e:
-            print(f"❌ Unexpected error: {e}")
+        if outcome == 'added':
+            success_count += 1
+        elif outcome == 'skipped':
+            skip_count += 1
+        else:
             error_count += 1
+        
+        if outcome in ('added', 'skipped'):
+            hook_cache.setdefault(repo.full_name, {}).setdefault(webhook_url, time.time())
+    
+    save_hook_cache(hook_cache)
     
     # Summary
     print()
@@ -173,25 +297,27 @@ def list_webhooks():
     print("📋 Listing Existing Webhooks")
     print("=" * 60)
     
-    g = Github(github_token)
+    g = create_github_client(github_token)
     user = g.get_user()
     repos = list(user.get_repos(type='public'))
     
-    webhook_count = 0
-    
-    for repo in repos:
+    def fetch_hooks(repo):
         try:
-            hooks = list(repo.get_hooks())
-            if hooks:
-                print(f"\n📦 {repo.full_name}")
-                for hook in hooks:
-                    webhook_count += 1
-                    url = hook.config.get('url', 'N/A')
-                    active = "✅" if hook.active else "❌"
-                    print(f"   {active} {url}")
-                    print(f"      Events: {', '.join(hook.events)}")
+            return list(repo.get_hooks())
         except GithubException:
-            pass  # Skip repos without access
+            return []  # Skip repos without access
+    
+    webhook_count = 0
+    
+    for repo, hooks in zip(repos, map_repos(github_token, fetch_hooks, repos)):
+        if hooks:
+            print(f"\n📦 {repo.full_name}")
+            for hook in hooks:
+                webhook_count += 1
+                url = hook.config.get('url', 'N/A')
+                active = "✅" if hook.active else "❌"
+                print(f"   {active} {url}")
+                print(f"      Events: {', '.join(hook.events)}")
     
     print()
     print("=" * 60)
@@ -213,7 +339,7 @@ def remove_webhooks():
     print(f"📍 Will remove webhooks matching: {webhook_url}")
     print()
     
-    g = Github(github_token)
+    g = create_github_client(github_token)
     user = g.get_user()
     repos = list(user.get_repos(type='public'))
     
@@ -225,18 +351,30 @@ def remove_webhooks():
         sys.exit(0)
     
     print()
-    removed_count = 0
     
-    for repo in repos:
+    def remove_hooks(repo):
+        removed = 0
         try:
-            hooks = repo.get_hooks()
-            for hook in hooks:
+            for hook in repo.get_hooks():
                 if hook.config.get('url') == webhook_url:
                     hook.delete()
-                    print(f"✅ Removed from {repo.full_name}")
-                    removed_count += 1
+                    removed += 1
         except GithubException:
             pass
+        return removed
+    
+    removed_count = 0
+    
+    for repo, removed in zip(repos, map_repos(github_token, remove_hooks, repos)):
+        if removed:
+            print(f"✅ Removed from {repo.full_name}")
+            removed_count += removed
+    
+    # Forget removed hooks so the next setup re-checks those repositories
+    hook_cache = load_hook_cache()
+    for repo_hooks in hook_cache.values():
+        repo_hooks.pop(webhook_url, None)
+    save_hook_cache(hook_cache)
     
     print()
     print(f"🎉 Removed {removed_count} webhooks")
@@ -251,11 +389,16 @@ if __name__ == "__main__":
         choices=['setup', 'list', 'remove'],
         help='Action to perform: setup (add webhooks), list (show existing), remove (delete webhooks)'
     )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Re-check every repository instead of skipping ones confirmed in the last 24 hours'
+    )
     
     args = parser.parse_args()
     
     if args.action == 'setup':
-        setup_webhooks()
+        setup_webhooks(use_cache=not args.no_cache)
     elif args.action == 'list':
         list_webhooks()
     elif args.action == 'remove':
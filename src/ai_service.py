@@ -3,70 +3,147 @@ AI service abstraction supporting multiple providers (Gemini and OpenAI).
 Includes user-specific response analysis and personalization.
 """
 from abc import ABC, abstractmethod
-from typing import Optional, List, Dict, Any
+from concurrent.futures import Future
+from typing import Optional, List, Dict, Any, Tuple, NamedTuple
 from datetime import datetime
+from functools import lru_cache
+import hashlib
+import random
+import threading
 import time
 import re
 
+from diskcache import Cache
+
 from src.config import Config
+from src.cache import TTLCache
 from src.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Emoji codepoints mapped to None: a comment contains an emoji iff
+# str.translate (a single C-level pass) makes it shorter
+_EMOJI_RANGES = (
+    (0x1F600, 0x1F64F),  # emoticons
+    (0x1F300, 0x1F5FF),  # symbols & pictographs
+    (0x1F680, 0x1F6FF),  # transport & map symbols
+    (0x1F1E0, 0x1F1FF),  # flags
+)
+_EMOJI_TABLE = {cp: None for start, end in _EMOJI_RANGES for cp in range(start, end + 1)}
+
+# Deletes sentence-ending punctuation; the length difference counts sentences
+_SENTENCE_PUNCT_DEL = str.maketrans('', '', '.!?')
+
+# Writing-style indicator words, matched against each comment's word set
+_WORD_RE = re.compile(r"[a-z]+")
+_FORMAL_WORDS = frozenset({'please', 'thank', 'would', 'could', 'kindly'})
+_CASUAL_WORDS = frozenset({'hey', 'yeah', 'cool', 'awesome', 'lol', 'btw'})
+_POSITIVE_WORDS = frozenset({'thanks', 'great', 'awesome', 'excellent', 'good', 'appreciate'})
+_QUESTION_WORDS = frozenset({'how', 'what', 'why', 'when', 'where'})
+
+# Word -> indicator categories it counts towards, so each comment's words are
+# classified in one pass of dict lookups instead of one set intersection per category
+_INDICATOR_CATEGORIES: Dict[str, Tuple[str, ...]] = {}
+for _category, _words in (
+    ("formal", _FORMAL_WORDS),
+    ("casual", _CASUAL_WORDS),
+    ("positive", _POSITIVE_WORDS),
+    ("question", _QUESTION_WORDS),
+):
+    for _word in _words:
+        _INDICATOR_CATEGORIES[_word] = _INDICATOR_CATEGORIES.get(_word, ()) + (_category,)
+del _category, _words, _word
+
+# Personalization instructions, keyed by the analyzed style values
+_LENGTH_GUIDELINES = {
+    "short": "- Keep response very brief (1-2 sentences)\n",
+    "medium": "- Keep response concise (2-3 sentences)\n",
+    "long": "- Provide detailed response (3-5 sentences)\n",
+}
+_FORMALITY_GUIDELINES = {
+    "formal": "- Use formal, professional language\n",
+    "casual": "- Use friendly, casual language\n",
+    "neutral": "- Use balanced, professional yet friendly language\n",
+}
+_TONE_GUIDELINES = {
+    "positive": "- Match their positive, enthusiastic tone\n",
+    "inquisitive": "- Be thorough and educational in your response\n",
+}
+_EMOJI_GUIDELINES = {
+    True: "- Feel free to use appropriate emojis\n",
+    False: "- Avoid using emojis\n",
+}
+
+
+class WritingStyle(NamedTuple):
+    """Writing style characteristics of a user."""
+    avg_length: int
+    tone: str
+    formality: str
+    uses_emojis: bool
+    avg_sentences: float
+
+
+# Style of a user with no comment history
+_DEFAULT_STYLE = WritingStyle(avg_length=0, tone="neutral", formality="neutral", uses_emojis=False, avg_sentences=0)
+
 
 class UserAnalyzer:
     """Analyzes user writing style and interaction patterns."""
 
     @staticmethod
-    def analyze_writing_style(user_comments: List[str]) -> Dict[str, Any]:
+    def analyze_writing_style(user_comments: List[str]) -> WritingStyle:
         """
         Analyze a user's writing style from their comment history.
+        Results are memoized, so repeated events from the same commenter
+        reuse the analysis while their comment history is unchanged.
 
         Args:
             user_comments: List of user's previous comments
 
         Returns:
-            Dictionary with writing style characteristics
+            Writing style characteristics
         """
+        return UserAnalyzer._analyze_comments(tuple(user_comments or ()))
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _analyze_comments(user_comments: Tuple[str, ...]) -> WritingStyle:
+        """Memoized implementation of analyze_writing_style."""
         if not user_comments:
-            return {
-                "avg_length": 0,
-                "tone": "neutral",
-                "formality": "neutral",
-                "uses_emojis": False,
-                "avg_sentences": 0
-            }
+            return _DEFAULT_STYLE
 
-        total_length = sum(len(comment) for comment in user_comments)
-        avg_length = total_length / len(user_comments)
+        # Single pass: lowercase and tokenize each comment once, then
+        # count indicators with one category lookup per distinct word
+        total_length = 0
+        total_sentences = 0
+        counts = {"formal": 0, "casual": 0, "positive": 0, "question": 0}
+        uses_emojis = False
 
-        # Check for emojis
-        emoji_pattern = re.compile("["
-            u"\U0001F600-\U0001F64F"  # emoticons
-            u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-            u"\U0001F680-\U0001F6FF"  # transport & map symbols
-            u"\U0001F1E0-\U0001F1FF"  # flags
-            "]+", flags=re.UNICODE)
-        uses_emojis = any(emoji_pattern.search(comment) for comment in user_comments)
-
-        # Count sentences (rough estimate)
-        total_sentences = sum(comment.count('.') + comment.count('!') + comment.count('?')
-                            for comment in user_comments)
-        avg_sentences = total_sentences / len(user_comments) if total_sentences > 0 else 1
+        for comment in user_comments:
+            low = comment.lower()
+            tokens = set(_WORD_RE.findall(low))
 
-        # Determine formality (simple heuristic)
-        formal_indicators = ['please', 'thank you', 'would', 'could', 'kindly']
-        casual_indicators = ['hey', 'yeah', 'cool', 'awesome', 'lol', 'btw']
+            total_length += len(comment)
+            # Count sentences (rough estimate): punctuation removed in one C-level pass
+            total_sentences += len(comment) - len(comment.translate(_SENTENCE_PUNCT_DEL))
 
-        formal_count = sum(
-            sum(1 for indicator in formal_indicators if indicator in comment.lower())
-            for comment in user_comments
-        )
-        casual_count = sum(
-            sum(1 for indicator in casual_indicators if indicator in comment.lower())
-            for comment in user_comments
-        )
+            for token in tokens:
+                for category in _INDICATOR_CATEGORIES.get(token, ()):
+                    counts[category] += 1
+            if '?' in low:
+                counts["question"] += 1
+
+            # ASCII-only comments (the common case) cannot contain emojis
+            if not uses_emojis and not comment.isascii():
+                uses_emojis = len(comment.translate(_EMOJI_TABLE)) != len(comment)
 
+        avg_length = total_length / len(user_comments)
+        avg_sentences = total_sentences / len(user_comments) if total_sentences > 0 else 1
+        formal_count, casual_count = counts["formal"], counts["casual"]
+        positive_count, question_count = counts["positive"], counts["question"]
+
+        # Determine formality (simple heuristic)
         if formal_count > casual_count * 1.5:
             formality = "formal"
         elif casual_count > formal_count * 1.5:
@@ -75,18 +152,6 @@ class UserAnalyzer:
             formality = "neutral"
 
         # Determine tone
-        positive_indicators = ['thanks', 'great', 'awesome', 'excellent', 'good', 'appreciate']
-        question_indicators = ['?', 'how', 'what', 'why', 'when', 'where']
-
-        positive_count = sum(
-            sum(1 for indicator in positive_indicators if indicator in comment.lower())
-            for comment in user_comments
-        )
-        question_count = sum(
-            sum(1 for indicator in question_indicators if indicator in comment.lower())
-            for comment in user_comments
-        )
-
         if positive_count > len(user_comments) * 0.5:
             tone = "positive"
         elif question_count > len(user_comments) * 0.5:
@@ -94,17 +159,17 @@ class UserAnalyzer:
         else:
             tone = "neutral"
 
-        return {
-            "avg_length": int(avg_length),
-            "tone": tone,
-            "formality": formality,
-            "uses_emojis": uses_emojis,
-            "avg_sentences": round(avg_sentences, 1)
-        }
+        return WritingStyle(
+            avg_length=int(avg_length),
+            tone=tone,
+            formality=formality,
+            uses_emojis=uses_emojis,
+            avg_sentences=round(avg_sentences, 1)
+        )
 
     @staticmethod
     def build_personalized_context(
-        user_style: Dict[str, Any],
+        user_style: WritingStyle,
         base_context: str
     ) -> str:
         """
@@ -117,50 +182,51 @@ class UserAnalyzer:
         Returns:
             Enhanced context with personalization instructions
         """
-        personalization = "\n\nPersonalization Guidelines:\n"
+        return base_context + UserAnalyzer._personalization(user_style)
 
-        # Adjust response length
-        if user_style["avg_length"] < 100:
-            personalization += "- Keep response very brief (1-2 sentences)\n"
-        elif user_style["avg_length"] < 300:
-            personalization += "- Keep response concise (2-3 sentences)\n"
-        else:
-            personalization += "- Provide detailed response (3-5 sentences)\n"
-
-        # Adjust formality
-        if user_style["formality"] == "formal":
-            personalization += "- Use formal, professional language\n"
-        elif user_style["formality"] == "casual":
-            personalization += "- Use friendly, casual language\n"
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _personalization(user_style: WritingStyle) -> str:
+        """Build the personalization instructions for a writing style (memoized)."""
+        if user_style.avg_length < 100:
+            length = "short"
+        elif user_style.avg_length < 300:
+            length = "medium"
         else:
-            personalization += "- Use balanced, professional yet friendly language\n"
+            length = "long"
 
-        # Adjust tone
-        if user_style["tone"] == "positive":
-            personalization += "- Match their positive, enthusiastic tone\n"
-        elif user_style["tone"] == "inquisitive":
-            personalization += "- Be thorough and educational in your response\n"
+        return "".join((
+            "\n\nPersonalization Guidelines:\n",
+            _LENGTH_GUIDELINES[length],
+            _FORMALITY_GUIDELINES.get(user_style.formality, _FORMALITY_GUIDELINES["neutral"]),
+            _TONE_GUIDELINES.get(user_style.tone, ""),
+            _EMOJI_GUIDELINES[bool(user_style.uses_emojis)]
+        ))
 
-        # Emoji usage
-        if user_style["uses_emojis"]:
-            personalization += "- Feel free to use appropriate emojis\n"
-        else:
-            personalization += "- Avoid using emojis\n"
-
-        return base_context + personalization
+    @staticmethod
+    def cache_clear():
+        """Drop memoized analyses, e.g. after the indicator configuration changes."""
+        UserAnalyzer._analyze_comments.cache_clear()
+        UserAnalyzer._personalization.cache_clear()
 
 
 class AIProvider(ABC):
     """Abstract base class for AI providers."""
     
     @abstractmethod
-    def generate_response(self, prompt: str, context: Optional[str] = None) -> Optional[str]:
+    def generate_response(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> Optional[str]:
         """
         Generate a response using the AI provider.
         
         Args:
             prompt: The prompt/question to respond to
             context: Additional context for the response
+            deadline: time.monotonic() value after which generation is abandoned
         
         Returns:
             Generated response or None if failed
@@ -173,8 +239,14 @@ class GeminiProvider(AIProvider):
 
     def __init__(self):
         """Initialize Gemini provider."""
+        # Prompt prefixes built once; the system instruction is identical across calls
+        self._prompt_prefix = f"{Config.SYSTEM_PROMPT}\n\nUser message:\n"
+        self._context_prefix = f"{Config.SYSTEM_PROMPT}\n\nContext:\n"
+
         try:
+            # Imported here so only the configured provider's SDK is ever loaded
             import google.generativeai as genai
+
             genai.configure(api_key=Config.GEMINI_API_KEY)
             self.model = genai.GenerativeModel(Config.GEMINI_MODEL)
             logger.info(f"Gemini AI provider initialized successfully with model: {Config.GEMINI_MODEL}")
@@ -182,8 +254,22 @@ class GeminiProvider(AIProvider):
             logger.error(f"Failed to initialize Gemini provider: {e}")
             raise
     
-    def generate_response(self, prompt: str, context: Optional[str] = None) -> Optional[str]:
-        """Generate response using Gemini."""
+    def generate_response(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Generate response using Gemini.
+
+        google-generativeai 0.3.2 takes no per-request timeout, so a call that
+        has started cannot be cut short; the deadline only stops new attempts.
+        """
+        if deadline is not None and time.monotonic() >= deadline:
+            logger.warning("Gemini response deadline already passed, not calling the API")
+            return None
+
         try:
             full_prompt = self._build_prompt(prompt, context)
             
@@ -202,43 +288,86 @@ class GeminiProvider(AIProvider):
     
     def _build_prompt(self, prompt: str, context: Optional[str] = None) -> str:
         """Build the full prompt with context."""
-        system_instruction = Config.SYSTEM_PROMPT
-
         if context:
-            return f"{system_instruction}\n\nContext:\n{context}\n\nUser message:\n{prompt}\n\nResponse:"
+            return "".join((self._context_prefix, context, "\n\nUser message:\n", prompt, "\n\nResponse:"))
         else:
-            return f"{system_instruction}\n\nUser message:\n{prompt}\n\nResponse:"
+            return "".join((self._prompt_prefix, prompt, "\n\nResponse:"))
 
 
 class OpenAIProvider(AIProvider):
     """OpenAI GPT provider."""
 
+    # Keep-alive connections shared by all handler threads, so TLS handshakes
+    # to the API are paid once per connection instead of per idle period
+    MAX_CONNECTIONS = 32
+
     def __init__(self):
         """Initialize OpenAI provider."""
+        # Shared by every request so the prompt prefix stays byte-identical
+        self._system_message = {"role": "system", "content": Config.SYSTEM_PROMPT}
+
         try:
-            from openai import OpenAI
-            self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+            # Imported here so only the configured provider's SDK is ever loaded
+            import httpx
+            from openai import DefaultHttpxClient, OpenAI
+
+            # AIService retries on its own, so disable the SDK's retries to
+            # keep a failing call from pinning a worker thread for minutes
+            self.client = OpenAI(
+                api_key=Config.OPENAI_API_KEY,
+                timeout=Config.AI_REQUEST_TIMEOUT,
+                max_retries=0,
+                http_client=DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=self.MAX_CONNECTIONS,
+                        max_keepalive_connections=self.MAX_CONNECTIONS,
+                        keepalive_expiry=300
+                    )
+                )
+            )
             self.model = Config.OPENAI_MODEL
             logger.info(f"OpenAI provider initialized successfully with model: {Config.OPENAI_MODEL}")
         except Exception as e:
             logger.error(f"Failed to initialize OpenAI provider: {e}")
             raise
     
-    def generate_response(self, prompt: str, context: Optional[str] = None) -> Optional[str]:
-        """Generate response using OpenAI."""
+    def generate_response(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Generate response using OpenAI.
+        The completion is streamed so a generation running past the
+        deadline can be abandoned instead of blocking until it finishes.
+        """
         try:
             messages = self._build_messages(prompt, context)
             
-            response = self.client.chat.completions.create(
+            stream = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 max_tokens=500,
-                temperature=0.7
+                temperature=0.7,
+                stream=True
             )
+
+            parts = []
+            for chunk in stream:
+                if chunk.choices:
+                    parts.append(chunk.choices[0].delta.content or "")
+
+                if deadline is not None and time.monotonic() > deadline:
+                    stream.close()
+                    logger.warning("OpenAI response exceeded its deadline, abandoning generation")
+                    return None
+
+            content = "".join(parts).strip()
             
-            if response.choices and response.choices[0].message.content:
+            if content:
                 logger.debug("Successfully generated response with OpenAI")
-                return response.choices[0].message.content.strip()
+                return content
             else:
                 logger.warning("OpenAI returned empty response")
                 return None
@@ -249,15 +378,10 @@ class OpenAIProvider(AIProvider):
     
     def _build_messages(self, prompt: str, context: Optional[str] = None) -> list:
         """Build messages array for OpenAI."""
-        system_message = {
-            "role": "system",
-            "content": Config.SYSTEM_PROMPT
-        }
-
         if context:
             user_message = {
                 "role": "user",
-                "content": f"Context:\n{context}\n\nUser message:\n{prompt}"
+                "content": "".join(("Context:\n", context, "\n\nUser message:\n", prompt))
             }
         else:
             user_message = {
@@ -265,53 +389,206 @@ class OpenAIProvider(AIProvider):
                 "content": prompt
             }
 
-        return [system_message, user_message]
+        return [self._system_message, user_message]
 
 
 class AIService:
     """Main AI service that manages provider selection and fallback."""
+
+    # Identical prompts within this window reuse the cached response
+    RESPONSE_CACHE_TTL = 600
+    RESPONSE_CACHE_SIZE = 512
+
+    # Responses persisted on disk survive restarts and are shared across workers
+    DISK_CACHE_TTL = 24 * 60 * 60
+    DISK_CACHE_SIZE_LIMIT = 64 * 1024 * 1024
+
+    # Longer contexts are truncated so prompts stay bounded and similar
+    # threads share a stable prefix for the provider's prompt cache
+    MAX_CONTEXT_CHARS = 8000
     
     def __init__(self):
-        """Initialize AI service with configured provider."""
-        self.provider: Optional[AIProvider] = None
-        self._initialize_provider()
+        """Initialize AI service. The provider is created on first use."""
+        self._provider: Optional[AIProvider] = None
+        self._provider_lock = threading.Lock()
+        self._response_cache = TTLCache(self.RESPONSE_CACHE_SIZE, self.RESPONSE_CACHE_TTL)
+        self._disk_cache: Optional[Cache] = None
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._initialize_disk_cache()
     
-    def _initialize_provider(self):
-        """Initialize the configured AI provider."""
+    @property
+    def provider(self) -> AIProvider:
+        """The configured AI provider, created (and its SDK imported) on first use."""
+        if self._provider is None:
+            with self._provider_lock:
+                if self._provider is None:
+                    self._provider = self._create_provider()
+        return self._provider
+
+    def _create_provider(self) -> AIProvider:
+        """Create the configured AI provider."""
         try:
             if Config.AI_PROVIDER == "gemini":
-                self.provider = GeminiProvider()
+                provider = GeminiProvider()
             elif Config.AI_PROVIDER == "openai":
-                self.provider = OpenAIProvider()
+                provider = OpenAIProvider()
             else:
                 raise ValueError(f"Unsupported AI provider: {Config.AI_PROVIDER}")
             
             logger.info(f"AI service initialized with provider: {Config.AI_PROVIDER}")
+            return provider
         
         except Exception as e:
             logger.error(f"Failed to initialize AI service: {e}")
             raise
+
+    def _initialize_disk_cache(self):
+        """Open the persistent response cache; run without it on failure."""
+        if not Config.AI_CACHE_DIR:
+            return
+
+        try:
+            self._disk_cache = Cache(Config.AI_CACHE_DIR, size_limit=self.DISK_CACHE_SIZE_LIMIT)
+            logger.info(f"Persistent AI response cache enabled at {Config.AI_CACHE_DIR}")
+        except Exception as e:
+            logger.warning(f"Failed to open AI response cache: {e}. Continuing without it.")
+
+    @classmethod
+    def _canonicalize_context(cls, context: Optional[str]) -> Optional[str]:
+        """Strip surrounding whitespace and cap the context length."""
+        if not context:
+            return None
+
+        context = context.strip()
+        return context[:cls.MAX_CONTEXT_CHARS] or None
+
+    @classmethod
+    def _personalized_context(cls, base_context: str, user_comments: List[str]) -> str:
+        """
+        Append personalization guidelines for a user's writing style to a context.
+        Only the base part is cut to fit MAX_CONTEXT_CHARS, so the guidelines
+        at the end always survive the length cap.
+
+        Args:
+            base_context: Context about the issue/PR
+            user_comments: User's previous comments for style analysis
+
+        Returns:
+            Enhanced context with personalization instructions
+        """
+        user_style = UserAnalyzer.analyze_writing_style(user_comments)
+        guidelines = UserAnalyzer.build_personalized_context(user_style, "")
+        logger.debug(f"Generated personalized context based on user style: {user_style}")
+
+        base_context = (base_context or "").strip()[:cls.MAX_CONTEXT_CHARS - len(guidelines)]
+        return base_context + guidelines
+
+    @staticmethod
+    def _cache_key(prompt: str, context: Optional[str]) -> str:
+        """Build a cache key from everything that shapes the response."""
+        model = Config.OPENAI_MODEL if Config.AI_PROVIDER == "openai" else Config.GEMINI_MODEL
+        data = "\0".join((Config.AI_PROVIDER, model, Config.SYSTEM_PROMPT, prompt, context or ""))
+        return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+    def _get_disk_cached(self, key: str) -> Optional[str]:
+        """Read a persisted response; cache errors never fail the request."""
+        if self._disk_cache is None:
+            return None
+
+        try:
+            return self._disk_cache.get(key)
+        except Exception as e:
+            logger.warning(f"AI response cache read failed: {e}")
+            return None
+
+    def _set_disk_cached(self, key: str, response: str):
+        """Persist a response; cache errors never fail the request."""
+        if self._disk_cache is None:
+            return
+
+        try:
+            self._disk_cache.set(key, response, expire=self.DISK_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"AI response cache write failed: {e}")
     
     def generate_response(
         self, 
         prompt: str, 
         context: Optional[str] = None,
-        max_retries: int = 3
+        max_retries: int = 3,
+        deadline: Optional[float] = None
     ) -> Optional[str]:
         """
         Generate a response with retry logic.
+
+        Identical requests share one provider call: a recent response is
+        served from cache, and concurrent duplicates wait for the call
+        already in flight (e.g. webhook redeliveries).
         
         Args:
             prompt: The prompt/question to respond to
             context: Additional context for the response
             max_retries: Maximum number of retry attempts
+            deadline: time.monotonic() value by which all attempts must finish
+                (defaults to AI_RESPONSE_DEADLINE seconds from now)
         
         Returns:
             Generated response or None if all attempts failed
         """
+        if deadline is None and Config.AI_RESPONSE_DEADLINE > 0:
+            deadline = time.monotonic() + Config.AI_RESPONSE_DEADLINE
+
+        context = self._canonicalize_context(context)
+        key = self._cache_key(prompt, context)
+
+        cached = self._response_cache.get(key)
+        if cached:
+            logger.debug("Using cached AI response")
+            return cached
+
+        # Promote a persisted response to memory; a memory hit keeps its original expiry
+        cached = self._get_disk_cached(key)
+        if cached:
+            logger.debug("Using persisted AI response")
+            self._response_cache.set(key, cached)
+            return cached
+
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not is_owner:
+            logger.debug("Waiting for identical in-flight AI request")
+            return future.result()
+
+        response = None
+        try:
+            response = self._generate_with_retries(prompt, context, max_retries, deadline)
+            if response:
+                self._response_cache.set(key, response)
+                self._set_disk_cached(key, response)
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            future.set_result(response)
+
+        return response
+
+    def _generate_with_retries(
+        self,
+        prompt: str,
+        context: Optional[str],
+        max_retries: int,
+        deadline: Optional[float] = None
+    ) -> Optional[str]:
+        """Call the provider with exponential backoff between attempts."""
         for attempt in range(max_retries):
             try:
-                response = self.provider.generate_response(prompt, context)
+                response = self.provider.generate_response(prompt, context, deadline)
                 if response:
                     return response
                 
@@ -321,8 +598,15 @@ class AIService:
                 logger.error(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
             
             if attempt < max_retries - 1:
-                wait_time = 2 ** attempt  # Exponential backoff
-                logger.info(f"Retrying in {wait_time} seconds...")
+                # Exponential backoff with jitter, so handler threads that failed
+                # together (e.g. a provider blip during a burst) don't retry in lockstep
+                wait_time = 2 ** attempt * random.uniform(0.5, 1.0)
+
+                if deadline is not None and time.monotonic() + wait_time >= deadline:
+                    logger.warning("No time left before the response deadline, not retrying")
+                    break
+
+                logger.info(f"Retrying in {wait_time:.1f} seconds...")
                 time.sleep(wait_time)
         
         logger.error("All attempts to generate AI response failed")
@@ -347,10 +631,7 @@ class AIService:
         """
         # Analyze user's writing style if comments provided
         if user_comments:
-            user_style = UserAnalyzer.analyze_writing_style(user_comments)
-            enhanced_context = UserAnalyzer.build_personalized_context(user_style, issue_context)
-            logger.debug(f"Generated personalized context based on user style: {user_style}")
-            return self.generate_response(comment_text, enhanced_context)
+            return self.generate_response(comment_text, self._personalized_context(issue_context, user_comments))
 
         return self.generate_response(comment_text, issue_context)
 
@@ -373,10 +654,7 @@ class AIService:
         """
         # Analyze user's writing style if comments provided
         if user_comments:
-            user_style = UserAnalyzer.analyze_writing_style(user_comments)
-            enhanced_context = UserAnalyzer.build_personalized_context(user_style, pr_context)
-            logger.debug(f"Generated personalized context based on user style: {user_style}")
-            return self.generate_response(comment_text, enhanced_context)
+            return self.generate_response(comment_text, self._personalized_context(pr_context, user_comments))
 
         return self.generate_response(comment_text, pr_context)
 
@@ -0,0 +1,133 @@
+"""
+In-memory caching helpers for GitHub Manager.
+Provides a thread-safe TTL memoizer for expensive, rarely-changing lookups
+and a bounded LRU cache with per-entry expiry.
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Sentinel distinguishing "not cached" from a cached None
+_MISSING = object()
+
+
+def ttl_cache(ttl_seconds: float) -> Callable:
+    """
+    Cache a function's return value for a fixed number of seconds.
+
+    Each decorated function has its own store keyed by positional arguments,
+    so the decorated function must only take hashable positional arguments.
+    Empty results (None, {}, [] ...) are not cached, so a lookup that failed
+    is retried on the next call instead of being served for the full TTL.
+
+    Args:
+        ttl_seconds: How long a cached value stays valid
+
+    Returns:
+        Decorator adding TTL caching and a ``cache_clear()`` method
+    """
+    def decorator(func: Callable) -> Callable:
+        # args -> (expiry timestamp, value)
+        cache: Dict[Tuple[Hashable, ...], Tuple[float, Any]] = {}
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            now = time.monotonic()
+
+            with lock:
+                entry = cache.get(args)
+            if entry and entry[0] > now:
+                return entry[1]
+
+            value = func(*args)
+
+            if value:
+                with lock:
+                    cache[args] = (now + ttl_seconds, value)
+            return value
+
+        def cache_clear():
+            """Drop all cached values for this function."""
+            with lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time."""
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        """
+        Initialize cache.
+
+        Args:
+            maxsize: Maximum number of entries before the least recently used is evicted
+            ttl: Seconds an entry stays valid (None for no expiry)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a cached value, refreshing its LRU position.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss or expired entry
+
+        Returns:
+            Cached value or default
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Store a value, evicting the least recently used entry if full.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        expiry = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+
+        with self._lock:
+            self._data[key] = (expiry, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove and return a cached value."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[1] if entry else default
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -3,12 +3,20 @@ Configuration management for GitHub Manager application.
 Handles environment variables and application settings.
 """
 import os
+from functools import lru_cache
 from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Supported providers and models (tuples keep the order used in error messages)
+_VALID_AI_PROVIDERS = frozenset({"gemini", "openai"})
+_VALID_OPENAI_MODELS = ("gpt-3.5-turbo", "gpt-4", "gpt-4-turbo", "gpt-4o", "gpt-4o-mini")
+_VALID_GEMINI_MODELS = ("gemini-pro", "gemini-1.5-pro", "gemini-1.5-flash")
+_OPENAI_MODEL_SET = frozenset(_VALID_OPENAI_MODELS)
+_GEMINI_MODEL_SET = frozenset(_VALID_GEMINI_MODELS)
+
 
 class Config:
     """Application configuration class."""
@@ -16,6 +24,15 @@ class Config:
     # GitHub Configuration
     GITHUB_TOKEN: str = os.getenv("GITHUB_TOKEN", "")
     GITHUB_WEBHOOK_SECRET: str = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+    # Optional default repository ("owner/repo"); all public repositories are
+    # managed regardless, this is only kept for single-repo tooling
+    GITHUB_REPO: str = os.getenv("GITHUB_REPO", "")
+
+    # Directory for the persistent ETag cache of GitHub GETs; empty keeps it in memory
+    GITHUB_CACHE_DIR: str = os.getenv("GITHUB_CACHE_DIR", "/tmp/gm_github_cache")
+
+    # Seconds fetched issues, comments and repository info are reused; 0 disables
+    GITHUB_CACHE_TTL: float = float(os.getenv("GITHUB_CACHE_TTL", "60"))
 
     # AI Configuration
     AI_PROVIDER: str = os.getenv("AI_PROVIDER", "gemini").lower()
@@ -26,6 +43,17 @@ class Config:
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
     GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-pro")
 
+    # Seconds a single AI request may take before it is abandoned (OpenAI only)
+    AI_REQUEST_TIMEOUT: float = float(os.getenv("AI_REQUEST_TIMEOUT", "30"))
+
+    # Seconds a complete AI reply (all attempts) may take; 0 disables the limit.
+    # Gemini calls can't be timed out (the SDK has no request timeout), so there
+    # it only prevents further attempts, and a stalled call still runs to completion
+    AI_RESPONSE_DEADLINE: float = float(os.getenv("AI_RESPONSE_DEADLINE", "60"))
+
+    # Directory for the persistent AI response cache; empty disables it
+    AI_CACHE_DIR: str = os.getenv("AI_CACHE_DIR", "/tmp/gm_ai_cache")
+
     # AI System Prompt (Customizable)
     SYSTEM_PROMPT: str = os.getenv(
         "SYSTEM_PROMPT",
@@ -43,15 +71,28 @@ class Config:
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     FLASK_ENV: str = os.getenv("FLASK_ENV", "production")
     PORT: int = int(os.getenv("PORT", "5000"))
+
+    # Webhook deliveries accepted per GitHub hook (Flask-Limiter syntax)
+    WEBHOOK_RATE_LIMIT: str = os.getenv("WEBHOOK_RATE_LIMIT", "30/minute")
+    RATE_LIMIT_STORAGE_URI: str = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
     
     @classmethod
     def validate(cls) -> tuple[bool, list[str]]:
         """
         Validate required configuration.
+        The result is computed once; call Config.clear_validation_cache()
+        after changing settings at runtime.
 
         Returns:
             Tuple of (is_valid, list_of_errors)
         """
+        errors = cls._validate()
+        return len(errors) == 0, list(errors)
+
+    @classmethod
+    @lru_cache(maxsize=1)
+    def _validate(cls) -> tuple[str, ...]:
+        """Collect configuration errors (memoized)."""
         errors = []
 
         # Required fields
@@ -62,7 +103,7 @@ class Config:
             errors.append("GITHUB_WEBHOOK_SECRET is required")
 
         # AI Provider validation
-        if cls.AI_PROVIDER not in ["gemini", "openai"]:
+        if cls.AI_PROVIDER not in _VALID_AI_PROVIDERS:
             errors.append("AI_PROVIDER must be either 'gemini' or 'openai'")
 
         if cls.AI_PROVIDER == "gemini" and not cls.GEMINI_API_KEY:
@@ -72,16 +113,18 @@ class Config:
             errors.append("OPENAI_API_KEY is required when AI_PROVIDER is 'openai'")
 
         # AI Model validation
-        valid_openai_models = ["gpt-3.5-turbo", "gpt-4", "gpt-4-turbo", "gpt-4o", "gpt-4o-mini"]
-        valid_gemini_models = ["gemini-pro", "gemini-1.5-pro", "gemini-1.5-flash"]
+        if cls.AI_PROVIDER == "openai" and cls.OPENAI_MODEL not in _OPENAI_MODEL_SET:
+            errors.append(f"OPENAI_MODEL must be one of: {', '.join(_VALID_OPENAI_MODELS)}")
 
-        if cls.AI_PROVIDER == "openai" and cls.OPENAI_MODEL not in valid_openai_models:
-            errors.append(f"OPENAI_MODEL must be one of: {', '.join(valid_openai_models)}")
+        if cls.AI_PROVIDER == "gemini" and cls.GEMINI_MODEL not in _GEMINI_MODEL_SET:
+            errors.append(f"GEMINI_MODEL must be one of: {', '.join(_VALID_GEMINI_MODELS)}")
 
-        if cls.AI_PROVIDER == "gemini" and cls.GEMINI_MODEL not in valid_gemini_models:
-            errors.append(f"GEMINI_MODEL must be one of: {', '.join(valid_gemini_models)}")
+        return tuple(errors)
 
-        return len(errors) == 0, errors
+    @classmethod
+    def clear_validation_cache(cls):
+        """Forget the memoized validate() result."""
+        cls._validate.cache_clear()
     
     @classmethod
     def has_email_configured(cls) -> bool:
@@ -91,10 +134,10 @@ class Config:
     @classmethod
     def get_valid_openai_models(cls) -> list[str]:
         """Get list of valid OpenAI models."""
-        return ["gpt-3.5-turbo", "gpt-4", "gpt-4-turbo", "gpt-4o", "gpt-4o-mini"]
+        return list(_VALID_OPENAI_MODELS)
 
     @classmethod
     def get_valid_gemini_models(cls) -> list[str]:
         """Get list of valid Gemini models."""
-        return ["gemini-pro", "gemini-1.5-pro", "gemini-1.5-flash"]
+        return list(_VALID_GEMINI_MODELS)
 
@@ -2,97 +2,23 @@
 Email notification service using Resend API.
 Fully optional - application works without email configuration.
 """
-from typing import Optional, Dict, Any
-from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+import atexit
+import hashlib
+import html
+import queue
+import threading
+import time
 
 from src.config import Config
+from src.cache import TTLCache
 from src.logger import setup_logger
 
 logger = setup_logger(__name__)
 
-
-class EmailService:
-    """Email notification service with optional configuration."""
-    
-    def __init__(self):
-        """Initialize email service."""
-        self.enabled = Config.has_email_configured()
-        self.client = None
-        
-        if self.enabled:
-            try:
-                import resend
-                resend.api_key = Config.RESEND_API_KEY
-                self.client = resend
-                logger.info("Email service initialized successfully")
-            except Exception as e:
-                logger.warning(f"Failed to initialize email service: {e}. Email notifications disabled.")
-                self.enabled = False
-        else:
-            logger.info("Email service not configured. Email notifications disabled.")
-    
-    def send_notification(
-        self,
-        subject: str,
-        html_content: str,
-        text_content: Optional[str] = None
-    ) -> bool:
-        """
-        Send an email notification to the repository owner.
-        
-        Args:
-            subject: Email subject
-            html_content: HTML email body
-            text_content: Plain text email body (optional)
-        
-        Returns:
-            True if sent successfully, False otherwise
-        """
-        if not self.enabled:
-            logger.debug("Email service not enabled, skipping notification")
-            return False
-        
-        try:
-            params = {
-                "from": "GitHub Manager <noreply@updates.github-manager.app>",
-                "to": [Config.OWNER_EMAIL],
-                "subject": subject,
-                "html": html_content,
-            }
-            
-            if text_content:
-                params["text"] = text_content
-            
-            response = self.client.Emails.send(params)
-            logger.info(f"Email notification sent successfully: {subject}")
-            return True
-        
-        except Exception as e:
-            logger.error(f"Failed to send email notification: {e}")
-            return False
-    
-    def notify_issue_assignment(
-        self,
-        issue_number: int,
-        issue_title: str,
-        assignee: str,
-        issue_url: str
-    ) -> bool:
-        """
-        Notify owner about issue assignment.
-        
-        Args:
-            issue_number: Issue number
-            issue_title: Issue title
-            assignee: Username of assigned user
-            issue_url: URL to the issue
-        
-        Returns:
-            True if sent successfully
-        """
-        subject = f"Issue #{issue_number} assigned to {assignee}"
-        
-        html_content = f"""
+# Notification bodies, rendered with str.format_map. HTML templates must be
+# given html.escape()d values; plain-text templates take them as-is.
+_ISSUE_HTML = """
         <html>
         <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
             <h2 style="color: #0366d6;">Issue Assignment Notification</h2>
@@ -101,7 +27,7 @@ class EmailService:
             <div style="background-color: #f6f8fa; padding: 15px; border-radius: 5px; margin: 20px 0;">
                 <p><strong>Issue:</strong> #{issue_number} - {issue_title}</p>
                 <p><strong>Assigned to:</strong> @{assignee}</p>
-                <p><strong>Time:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
+                <p><strong>Time:</strong> {time}</p>
             </div>
             
             <p>
@@ -117,46 +43,21 @@ class EmailService:
         </body>
         </html>
         """
-        
-        text_content = f"""
+
+_ISSUE_TEXT = """
         Issue Assignment Notification
         
         Issue: #{issue_number} - {issue_title}
         Assigned to: @{assignee}
-        Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}
+        Time: {time}
         
         View issue: {issue_url}
         
         ---
         This is an automated notification from GitHub Manager.
         """
-        
-        return self.send_notification(subject, html_content, text_content)
-    
-    def notify_pr_activity(
-        self,
-        pr_number: int,
-        pr_title: str,
-        activity_type: str,
-        details: str,
-        pr_url: str
-    ) -> bool:
-        """
-        Notify owner about pull request activity.
-        
-        Args:
-            pr_number: PR number
-            pr_title: PR title
-            activity_type: Type of activity (e.g., "New Comment", "Question")
-            details: Activity details
-            pr_url: URL to the PR
-        
-        Returns:
-            True if sent successfully
-        """
-        subject = f"PR #{pr_number}: {activity_type}"
-        
-        html_content = f"""
+
+_PR_HTML = """
         <html>
         <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
             <h2 style="color: #0366d6;">Pull Request Activity</h2>
@@ -166,7 +67,7 @@ class EmailService:
                 <p><strong>Pull Request:</strong> #{pr_number} - {pr_title}</p>
                 <p><strong>Activity:</strong> {activity_type}</p>
                 <p><strong>Details:</strong> {details}</p>
-                <p><strong>Time:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
+                <p><strong>Time:</strong> {time}</p>
             </div>
             
             <p>
@@ -182,37 +83,22 @@ class EmailService:
         </body>
         </html>
         """
-        
-        text_content = f"""
+
+_PR_TEXT = """
         Pull Request Activity
         
         Pull Request: #{pr_number} - {pr_title}
         Activity: {activity_type}
         Details: {details}
-        Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}
+        Time: {time}
         
         View pull request: {pr_url}
         
         ---
         This is an automated notification from GitHub Manager.
         """
-        
-        return self.send_notification(subject, html_content, text_content)
-    
-    def notify_error(self, error_type: str, error_details: str) -> bool:
-        """
-        Notify owner about application errors.
-        
-        Args:
-            error_type: Type of error
-            error_details: Error details
-        
-        Returns:
-            True if sent successfully
-        """
-        subject = f"GitHub Manager Error: {error_type}"
-        
-        html_content = f"""
+
+_ERROR_HTML = """
         <html>
         <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
             <h2 style="color: #d73a49;">Error Notification</h2>
@@ -222,7 +108,7 @@ class EmailService:
                 <p><strong>Error Type:</strong> {error_type}</p>
                 <p><strong>Details:</strong></p>
                 <pre style="background-color: #f6f8fa; padding: 10px; border-radius: 3px; overflow-x: auto;">{error_details}</pre>
-                <p><strong>Time:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
+                <p><strong>Time:</strong> {time}</p>
             </div>
             
             <hr style="margin: 30px 0; border: none; border-top: 1px solid #e1e4e8;">
@@ -232,17 +118,284 @@ class EmailService:
         </body>
         </html>
         """
-        
-        text_content = f"""
+
+_ERROR_TEXT = """
         Error Notification
         
         Error Type: {error_type}
         Details: {error_details}
-        Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}
+        Time: {time}
         
         ---
         This is an automated notification from GitHub Manager.
         """
+
+
+# (epoch second, formatted UTC timestamp) of the last formatted time
+_timestamp_cache: Tuple[int, str] = (0, "")
+
+
+def _now_utc() -> str:
+    """Current UTC time as text, reformatted at most once per second."""
+    global _timestamp_cache
+    now = int(time.time())
+    cached_at, formatted = _timestamp_cache
+    if now != cached_at:
+        formatted = time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(now))
+        _timestamp_cache = (now, formatted)
+    return formatted
+
+
+def _render(html_template: str, text_template: str, params: Dict[str, Any]) -> tuple[str, str]:
+    """
+    Render a notification's HTML and plain-text bodies.
+
+    Args:
+        html_template: HTML template; values are HTML-escaped before rendering
+        text_template: Plain-text template
+        params: Template values (a "time" stamp is added)
+
+    Returns:
+        Tuple of (html_content, text_content)
+    """
+    params["time"] = _now_utc()
+    html_params = {key: html.escape(str(value)) for key, value in params.items()}
+    return html_template.format_map(html_params), text_template.format_map(params)
+
+
+class EmailService:
+    """Email notification service with optional configuration.
+    Notifications are queued and sent in batches by a background thread,
+    so a slow mail provider never delays webhook handling."""
+
+    # Up to this many queued emails go out in one Resend batch request
+    BATCH_SIZE = 100
+    # Seconds to wait for more emails before sending a partial batch
+    FLUSH_INTERVAL = 0.1
+    # Notifications beyond this backlog are dropped rather than held in memory
+    MAX_PENDING = 1000
+
+    # Identical notifications within this many seconds are sent only once
+    DEDUPE_WINDOW = 60
+    DEDUPE_SIZE = 1024
+
+    # Queued to tell the sender thread to flush and exit
+    _STOP = object()
+    
+    def __init__(self):
+        """Initialize email service."""
+        self.enabled = Config.has_email_configured()
+        self.client = None
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=self.MAX_PENDING)
+        self._sender: Optional[threading.Thread] = None
+        self._recent = TTLCache(self.DEDUPE_SIZE, self.DEDUPE_WINDOW)
+        
+        if self.enabled:
+            # The resend SDK is imported by the sender thread on the first send
+            self._sender = threading.Thread(target=self._send_loop, name="email-sender", daemon=True)
+            self._sender.start()
+            atexit.register(self.close)
+            logger.info("Email service initialized successfully")
+        else:
+            logger.info("Email service not configured. Email notifications disabled.")
+    
+    def send_notification(
+        self,
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None,
+        dedupe_key: Optional[str] = None
+    ) -> bool:
+        """
+        Queue an email notification to the repository owner.
+        Duplicates of a notification queued within DEDUPE_WINDOW seconds
+        (e.g. from webhook redeliveries) are skipped.
+        
+        Args:
+            subject: Email subject
+            html_content: HTML email body
+            text_content: Plain text email body (optional)
+            dedupe_key: Identifies duplicate notifications (defaults to subject and HTML body)
+        
+        Returns:
+            True if queued for sending (or already queued recently), False otherwise
+        """
+        if not self.enabled:
+            logger.debug("Email service not enabled, skipping notification")
+            return False
+
+        key = hashlib.blake2b(
+            (dedupe_key or f"{subject}\0{html_content}").encode(),
+            digest_size=16
+        ).digest()
+        if key in self._recent:
+            logger.debug(f"Skipping duplicate email notification: {subject}")
+            return True
+        self._recent.set(key, True)
+        
+        params = {
+            "from": "GitHub Manager <noreply@updates.github-manager.app>",
+            "to": [Config.OWNER_EMAIL],
+            "subject": subject,
+            "html": html_content,
+        }
+        
+        if text_content:
+            params["text"] = text_content
+        
+        try:
+            self._queue.put_nowait(params)
+            logger.debug(f"Email notification queued: {subject}")
+            return True
+        except queue.Full:
+            # Not queued, so a retry must not be skipped as a duplicate
+            self._recent.pop(key)
+            logger.error(f"Email queue full, dropping notification: {subject}")
+            return False
+
+    def close(self, timeout: float = 10.0):
+        """
+        Send any queued notifications and stop the sender thread.
+
+        Args:
+            timeout: Seconds to wait for the queue to drain
+        """
+        if not self._sender or not self._sender.is_alive():
+            return
+
+        self._queue.put(self._STOP)
+        self._sender.join(timeout)
+
+    def _send_loop(self):
+        """Collect queued notifications into batches and send them."""
+        while True:
+            batch: List[Dict[str, Any]] = []
+            item = self._queue.get()
+            flush_by = time.monotonic() + self.FLUSH_INTERVAL
+
+            while item is not self._STOP:
+                batch.append(item)
+                remaining = flush_by - time.monotonic()
+                if len(batch) >= self.BATCH_SIZE or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._send_batch(batch)
+
+            if item is self._STOP:
+                return
+
+    def _send_batch(self, batch: List[Dict[str, Any]]):
+        """
+        Send a batch of notifications with a single API request.
+
+        Args:
+            batch: Resend email params, one per notification
+        """
+        try:
+            if self.client is None:
+                import resend
+                resend.api_key = Config.RESEND_API_KEY
+                self.client = resend
+
+            if len(batch) == 1:
+                self.client.Emails.send(batch[0])
+            else:
+                self.client.Batch.send(batch)
+            for params in batch:
+                logger.info(f"Email notification sent successfully: {params['subject']}")
+        except Exception as e:
+            logger.error(f"Failed to send {len(batch)} email notification(s): {e}")
+    
+    def _notify(self, subject: str, html_template: str, text_template: str, params: Dict[str, Any]) -> bool:
+        """Render a templated notification and queue it, deduplicating on its content."""
+        if not self.enabled:
+            logger.debug("Email service not enabled, skipping notification")
+            return False
+
+        # Keyed before the timestamp is added, so repeats seconds apart still match
+        dedupe_key = f"{subject}\0{sorted(params.items())!r}"
+        html_content, text_content = _render(html_template, text_template, params)
+        return self.send_notification(subject, html_content, text_content, dedupe_key)
+
+    def notify_issue_assignment(
+        self,
+        issue_number: int,
+        issue_title: str,
+        assignee: str,
+        issue_url: str
+    ) -> bool:
+        """
+        Notify owner about issue assignment.
+        
+        Args:
+            issue_number: Issue number
+            issue_title: Issue title
+            assignee: Username of assigned user
+            issue_url: URL to the issue
+        
+        Returns:
+            True if queued for sending
+        """
+        subject = f"Issue #{issue_number} assigned to {assignee}"
+        
+        return self._notify(subject, _ISSUE_HTML, _ISSUE_TEXT, {
+            "issue_number": issue_number,
+            "issue_title": issue_title,
+            "assignee": assignee,
+            "issue_url": issue_url
+        })
+    
+    def notify_pr_activity(
+        self,
+        pr_number: int,
+        pr_title: str,
+        activity_type: str,
+        details: str,
+        pr_url: str
+    ) -> bool:
+        """
+        Notify owner about pull request activity.
+        
+        Args:
+            pr_number: PR number
+            pr_title: PR title
+            activity_type: Type of activity (e.g., "New Comment", "Question")
+            details: Activity details
+            pr_url: URL to the PR
+        
+        Returns:
+            True if queued for sending
+        """
+        subject = f"PR #{pr_number}: {activity_type}"
+        
+        return self._notify(subject, _PR_HTML, _PR_TEXT, {
+            "pr_number": pr_number,
+            "pr_title": pr_title,
+            "activity_type": activity_type,
+            "details": details,
+            "pr_url": pr_url
+        })
+    
+    def notify_error(self, error_type: str, error_details: str) -> bool:
+        """
+        Notify owner about application errors.
+        
+        Args:
+            error_type: Type of error
+            error_details: Error details
+        
+        Returns:
+            True if queued for sending
+        """
+        subject = f"GitHub Manager Error: {error_type}"
         
-        return self.send_notification(subject, html_content, text_content)
+        return self._notify(subject, _ERROR_HTML, _ERROR_TEXT, {
+            "error_type": error_type,
+            "error_details": error_details
+        })
 
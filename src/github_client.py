@@ -2,41 +2,122 @@
 GitHub API client with rate limiting and error handling.
 Supports multi-repository management.
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Callable, TypeVar
 from datetime import datetime, timedelta
+from itertools import islice
+import random
+import re
+import threading
 import time
+from diskcache import Cache
 from github import Github, GithubException, RateLimitExceededException
 from github.Repository import Repository
 from github.Issue import Issue
 from github.PullRequest import PullRequest
 from github.IssueComment import IssueComment
 from github.AuthenticatedUser import AuthenticatedUser
+from urllib3.util.retry import Retry
 
 from src.config import Config
+from src.cache import TTLCache
 from src.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+T = TypeVar("T")
+
+# Matches each <url>; rel="name" entry of a GitHub Link header
+_LINK_RE = re.compile(r'<([^>]+)>;\s*rel="(\w+)"')
+
+# Recently updated issues and PRs with their comments, in one round-trip
+_COMMENT_HISTORY_QUERY = """
+query($owner: String!, $name: String!, $count: Int!) {
+  repository(owner: $owner, name: $name) {
+    issues(first: $count, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      nodes { updatedAt comments(first: 100) { nodes { author { login } body } } }
+    }
+    pullRequests(first: $count, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      nodes { updatedAt comments(first: 100) { nodes { author { login } body } } }
+    }
+  }
+}
+"""
+
 
 class GitHubClient:
     """GitHub API client with enhanced error handling and rate limiting.
     Supports multi-repository management."""
 
+    # Transport-level retries only cover dropped connections; status codes are
+    # retried by _call, so PyGithub's default of 10 status retries would multiply
+    # with MAX_ATTEMPTS and hold a thread for minutes
+    TRANSPORT_RETRY = Retry(total=3, backoff_factor=0.5, status_forcelist=(), raise_on_status=False)
+
+    # Issues, comments and repository info fetched within GITHUB_CACHE_TTL
+    # seconds are reused, so a burst of events on one issue costs one round-trip
+    CACHE_SIZE = 1024
+    # Pull requests change more often (pushes, reviews, merges)
+    PR_CACHE_TTL = 15
+
+    # Recently updated issues scanned for a user's comment history
+    COMMENT_HISTORY_ISSUES = 20
+
+    # Attempts per API call on rate limiting or server errors, and the longest
+    # single wait; a reset further out fails the call instead of pinning a thread
+    MAX_ATTEMPTS = 4
+    MAX_RETRY_WAIT = 60
+
+    # Repository objects hold their requester and raw JSON, so keep only the
+    # most recent ones; expiry also drops renamed or deleted repositories
+    REPO_CACHE_SIZE = 256
+    REPO_CACHE_TTL = 600
+
+    # Bounds for the persistent ETag cache; a stale entry only costs a full 200
+    ETAG_CACHE_SIZE = 4096
+    ETAG_DISK_SIZE_LIMIT = 128 * 1024 * 1024
+
     def __init__(self):
         """Initialize GitHub client."""
-        self.client = Github(Config.GITHUB_TOKEN, per_page=100)
+        self.client = Github(
+            Config.GITHUB_TOKEN,
+            per_page=100,
+            retry=self.TRANSPORT_RETRY,
+        )
+        # PyGithub's Requester keeps the in-flight connection on the client, so
+        # concurrent requests could read each other's responses; every API call
+        # made through this client holds the lock
+        self._lock = threading.RLock()
         self.user: Optional[AuthenticatedUser] = None
         self._rate_limit_reset_time: Optional[datetime] = None
-        self._repositories_cache: Dict[str, Repository] = {}
+        self._repositories_cache = TTLCache(self.REPO_CACHE_SIZE, self.REPO_CACHE_TTL)
+        # URL -> (ETag, JSON body, Link relations) for conditional GETs,
+        # persisted across restarts when a cache directory is configured
+        self._etag_cache = self._open_etag_cache()
+        self._issue_cache = TTLCache(self.CACHE_SIZE, Config.GITHUB_CACHE_TTL)
+        self._comments_cache = TTLCache(self.CACHE_SIZE, Config.GITHUB_CACHE_TTL)
+        self._repo_info_cache = TTLCache(self.CACHE_SIZE, Config.GITHUB_CACHE_TTL)
+        self._pr_cache = TTLCache(self.CACHE_SIZE, min(self.PR_CACHE_TTL, Config.GITHUB_CACHE_TTL))
         self._initialize_user()
 
+    def _open_etag_cache(self):
+        """Open the persistent ETag cache; fall back to memory on failure."""
+        if Config.GITHUB_CACHE_DIR:
+            try:
+                cache = Cache(Config.GITHUB_CACHE_DIR, size_limit=self.ETAG_DISK_SIZE_LIMIT)
+                logger.info("Persistent GitHub response cache enabled at %s", Config.GITHUB_CACHE_DIR)
+                return cache
+            except Exception as e:
+                logger.warning("Failed to open GitHub response cache: %s. Keeping it in memory.", e)
+
+        return TTLCache(self.ETAG_CACHE_SIZE)
+
     def _initialize_user(self):
         """Initialize authenticated user."""
         try:
             self.user = self.client.get_user()
-            logger.info(f"Successfully authenticated as: {self.user.login}")
+            logger.info("Successfully authenticated as: %s", self.user.login)
         except GithubException as e:
-            logger.error(f"Failed to authenticate user: {e}")
+            logger.error("Failed to authenticate user: %s", e)
             raise
     
     def get_repository(self, repo_full_name: str) -> Optional[Repository]:
@@ -50,17 +131,19 @@ class GitHubClient:
         Returns:
             Repository object or None if not found
         """
-        if repo_full_name in self._repositories_cache:
-            return self._repositories_cache[repo_full_name]
+        repo = self._repositories_cache.get(repo_full_name)
+        if repo is not None:
+            return repo
 
         try:
             self._check_rate_limit()
-            repo = self.client.get_repo(repo_full_name)
-            self._repositories_cache[repo_full_name] = repo
-            logger.debug(f"Retrieved and cached repository: {repo_full_name}")
+            data, _ = self._call(lambda: self._conditional_get(f"/repos/{repo_full_name}"))
+            repo = self.client.create_from_raw_data(Repository, data)
+            self._repositories_cache.set(repo_full_name, repo)
+            logger.debug("Retrieved and cached repository: %s", repo_full_name)
             return repo
         except GithubException as e:
-            logger.error(f"Error retrieving repository {repo_full_name}: {e}")
+            logger.error("Error retrieving repository %s: %s", repo_full_name, e)
             return None
 
     def get_all_public_repositories(self) -> List[Repository]:
@@ -72,41 +155,164 @@ class GitHubClient:
         """
         try:
             self._check_rate_limit()
-            repos = [repo for repo in self.user.get_repos() if not repo.private]
-            logger.info(f"Found {len(repos)} public repositories")
+            url = "/user/repos?per_page=100&visibility=public"
+            pages = []
+
+            # Pages are fetched one after another: PyGithub's Requester keeps the
+            # in-flight connection on the shared client, so concurrent requests
+            # can read each other's responses. Unchanged pages revalidate with a 304.
+            while url:
+                data, links = self._call(lambda: self._conditional_get(url))
+                pages.append(data)
+                url = links.get("next")
+
+            repos = [
+                self.client.create_from_raw_data(Repository, raw)
+                for page in pages
+                for raw in page or []
+                if not raw.get("private")
+            ]
+
+            logger.info("Found %s public repositories", len(repos))
 
             # Cache all repositories
             for repo in repos:
-                self._repositories_cache[repo.full_name] = repo
+                self._repositories_cache.set(repo.full_name, repo)
 
             return repos
         except GithubException as e:
-            logger.error(f"Error retrieving public repositories: {e}")
+            logger.error("Error retrieving public repositories: %s", e)
             return []
 
+    def _conditional_get(self, url: str) -> Tuple[Any, Dict[str, str]]:
+        """
+        GET a page from the REST API, revalidating with its cached ETag.
+        A 304 Not Modified does not count against the rate limit.
+
+        Args:
+            url: API path or absolute URL
+
+        Returns:
+            Tuple of (JSON body, Link header relations such as "next" and "last")
+        """
+        cached = self._get_etag_entry(url)
+        headers = {"If-None-Match": cached[0]} if cached else None
+
+        response_headers, data = self.client._Github__requester.requestJsonAndCheck(
+            "GET", url, headers=headers
+        )
+
+        # PyGithub returns no body for a 304 Not Modified
+        if data is None and cached:
+            logger.debug("Not modified, using cached response: %s", url)
+            return cached[1], cached[2]
+
+        links = {rel: link for link, rel in _LINK_RE.findall(response_headers.get("link", ""))}
+
+        etag = response_headers.get("etag")
+        if etag:
+            self._set_etag_entry(url, (etag, data, links))
+
+        return data, links
+
+    def _get_etag_entry(self, url: str) -> Optional[Tuple[str, Any, Dict[str, str]]]:
+        """Read a cached response; cache errors never fail the request."""
+        try:
+            return self._etag_cache.get(url)
+        except Exception as e:
+            logger.warning("GitHub response cache read failed: %s", e)
+            return None
+
+    def _set_etag_entry(self, url: str, entry: Tuple[str, Any, Dict[str, str]]):
+        """Persist a response with its ETag; failures are logged and ignored."""
+        try:
+            self._etag_cache.set(url, entry)
+        except Exception as e:
+            logger.warning("GitHub response cache write failed: %s", e)
+
     def _check_rate_limit(self):
-        """Check and handle rate limiting."""
+        """
+        Check and handle rate limiting.
+        Reads the X-RateLimit-* headers PyGithub records from the last API
+        response instead of spending a request on GET /rate_limit.
+        """
         try:
-            rate_limit = self.client.get_rate_limit()
-            core_limit = rate_limit.core
+            with self._lock:
+                remaining, limit = self.client.rate_limiting
 
-            if core_limit.remaining < 10:
-                reset_time = core_limit.reset
-                wait_seconds = (reset_time - datetime.now()).total_seconds()
+            if remaining < 10:
+                reset_timestamp = self.client.rate_limiting_resettime
+                self._rate_limit_reset_time = datetime.fromtimestamp(reset_timestamp)
+                wait_seconds = reset_timestamp - time.time()
 
                 if wait_seconds > 0:
                     logger.warning(
-                        f"Rate limit nearly exceeded. "
-                        f"Remaining: {core_limit.remaining}. "
-                        f"Waiting {wait_seconds:.0f} seconds until reset."
+                        "Rate limit nearly exceeded. "
+                        "Remaining: %s. "
+                        "Waiting %.0f seconds until reset.",
+                        remaining, wait_seconds
                     )
                     time.sleep(wait_seconds + 1)
 
-            logger.debug(f"Rate limit remaining: {core_limit.remaining}/{core_limit.limit}")
+            logger.debug("Rate limit remaining: %s/%s", remaining, limit)
 
         except Exception as e:
-            logger.error(f"Error checking rate limit: {e}")
+            logger.error("Error checking rate limit: %s", e)
     
+    def _call(self, func: Callable[[], T], idempotent: bool = True) -> T:
+        """
+        Run an API call, retrying rate-limit and server errors with backoff.
+
+        PyGithub's transport already retries individual HTTP failures; this
+        covers the errors it gives up on. Waits honor Retry-After and
+        X-RateLimit-Reset when present, else use exponential backoff with jitter.
+
+        Args:
+            func: Zero-argument callable performing the API call
+            idempotent: Whether the call may be repeated after a server error
+                (a failed write may still have been applied, e.g. a comment)
+
+        Returns:
+            The callable's result
+
+        Raises:
+            GithubException: When attempts are exhausted or the error is not retryable
+        """
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            try:
+                # The lock is released between attempts, so backoff waits don't block other callers
+                with self._lock:
+                    return func()
+            except GithubException as e:
+                rate_limited = isinstance(e, RateLimitExceededException)
+                server_error = e.status >= 500 and idempotent
+                if attempt == self.MAX_ATTEMPTS or not (rate_limited or server_error):
+                    raise
+
+                wait_seconds = self._retry_wait(e, attempt)
+                if wait_seconds > self.MAX_RETRY_WAIT:
+                    raise
+
+                logger.warning(
+                    "GitHub API error %s (attempt %s/%s), retrying in %.1f seconds",
+                    e.status, attempt, self.MAX_ATTEMPTS, wait_seconds
+                )
+                time.sleep(wait_seconds)
+
+    @staticmethod
+    def _retry_wait(error: GithubException, attempt: int) -> float:
+        """Seconds to wait before retrying a failed API call."""
+        headers = error.headers or {}
+        jitter = random.uniform(0, 1)
+
+        if "retry-after" in headers:
+            return float(headers["retry-after"]) + jitter
+
+        if headers.get("x-ratelimit-remaining") == "0" and "x-ratelimit-reset" in headers:
+            return max(0.0, int(headers["x-ratelimit-reset"]) - time.time()) + jitter
+
+        return random.uniform(0, 2 ** attempt)
+
     def get_issue(self, repo: Repository, issue_number: int) -> Optional[Issue]:
         """
         Get an issue by number from a specific repository.
@@ -118,13 +324,21 @@ class GitHubClient:
         Returns:
             Issue object or None if not found
         """
+        # Same as the issue's API URL, so it can be invalidated from the Issue itself
+        key = f"{repo.url}/issues/{issue_number}"
+        issue = self._issue_cache.get(key)
+        if issue is not None:
+            return issue
+
         try:
             self._check_rate_limit()
-            issue = repo.get_issue(issue_number)
-            logger.debug(f"Retrieved issue #{issue_number} from {repo.full_name}")
+            data, _ = self._call(lambda: self._conditional_get(key))
+            issue = self.client.create_from_raw_data(Issue, data)
+            self._issue_cache.set(key, issue)
+            logger.debug("Retrieved issue #%s from %s", issue_number, repo.full_name)
             return issue
         except GithubException as e:
-            logger.error(f"Error retrieving issue #{issue_number} from {repo.full_name}: {e}")
+            logger.error("Error retrieving issue #%s from %s: %s", issue_number, repo.full_name, e)
             return None
 
     def get_pull_request(self, repo: Repository, pr_number: int) -> Optional[PullRequest]:
@@ -138,32 +352,60 @@ class GitHubClient:
         Returns:
             PullRequest object or None if not found
         """
+        # Same as the PR's API URL, so it can be invalidated from webhook payloads
+        key = f"{repo.url}/pulls/{pr_number}"
+        pr = self._pr_cache.get(key)
+        if pr is not None:
+            return pr
+
         try:
             self._check_rate_limit()
-            pr = repo.get_pull(pr_number)
-            logger.debug(f"Retrieved PR #{pr_number} from {repo.full_name}")
+            pr = self._call(lambda: repo.get_pull(pr_number))
+            self._pr_cache.set(key, pr)
+            logger.debug("Retrieved PR #%s from %s", pr_number, repo.full_name)
             return pr
         except GithubException as e:
-            logger.error(f"Error retrieving PR #{pr_number} from {repo.full_name}: {e}")
+            logger.error("Error retrieving PR #%s from %s: %s", pr_number, repo.full_name, e)
             return None
     
-    def get_issue_comments(self, issue: Issue) -> List[IssueComment]:
+    def invalidate_pull_request(self, pr_url: str):
+        """
+        Drop a cached pull request, e.g. after an event that changed it.
+
+        Args:
+            pr_url: The pull request's API URL
         """
-        Get all comments for an issue.
+        self._pr_cache.pop(pr_url)
+
+    def get_issue_comments(self, issue: Issue, limit: Optional[int] = None) -> List[IssueComment]:
+        """
+        Get the comments for an issue, oldest first.
         
         Args:
             issue: Issue object
+            limit: Only return the first this many comments, fetching just
+                the pages needed for them (None for all)
         
         Returns:
             List of comment objects
         """
+        comments = self._comments_cache.get(issue.url)
+        if comments is not None:
+            return list(comments[:limit])
+
         try:
             self._check_rate_limit()
-            comments = list(issue.get_comments())
-            logger.debug(f"Retrieved {len(comments)} comments for issue #{issue.number}")
-            return comments
+
+            # A partial list is not cached, the full one is still unknown
+            if limit is not None:
+                return self._call(lambda: list(islice(issue.get_comments(), limit)))
+
+            comments = self._call(lambda: list(issue.get_comments()))
+            self._comments_cache.set(issue.url, comments)
+            logger.debug("Retrieved %s comments for issue #%s", len(comments), issue.number)
+            return list(comments)
         except GithubException as e:
-            logger.error(f"Error retrieving comments for issue #{issue.number}: {e}")
+            logger.error("Error retrieving comments for issue #%s: %s", issue.number, e)
             return []
     
     def add_comment(self, issue: Issue, comment: str) -> bool:
@@ -179,13 +421,23 @@ class GitHubClient:
         """
         try:
             self._check_rate_limit()
-            issue.create_comment(comment)
-            logger.info(f"Added comment to issue #{issue.number}")
+            self._call(lambda: issue.create_comment(comment), idempotent=False)
+            self.invalidate_issue_comments(issue)
+            logger.info("Added comment to issue #%s", issue.number)
             return True
         except GithubException as e:
-            logger.error(f"Error adding comment to issue #{issue.number}: {e}")
+            logger.error("Error adding comment to issue #%s: %s", issue.number, e)
             return False
     
+    def invalidate_issue_comments(self, issue: Issue):
+        """
+        Drop an issue's cached comments, e.g. after a new comment is posted.
+
+        Args:
+            issue: Issue or PullRequest object
+        """
+        self._comments_cache.pop(issue.url)
+    
     def assign_issue(self, issue: Issue, assignee: str) -> bool:
         """
         Assign an issue to a user.
@@ -199,33 +451,14 @@ class GitHubClient:
         """
         try:
             self._check_rate_limit()
-            issue.add_to_assignees(assignee)
-            logger.info(f"Assigned issue #{issue.number} to {assignee}")
+            self._call(lambda: issue.add_to_assignees(assignee))
+            self._issue_cache.pop(issue.url)
+            logger.info("Assigned issue #%s to %s", issue.number, assignee)
             return True
         except GithubException as e:
-            logger.error(f"Error assigning issue #{issue.number} to {assignee}: {e}")
+            logger.error("Error assigning issue #%s to %s: %s", issue.number, assignee, e)
             return False
     
-    def get_user_comment_count(self, issue: Issue, username: str) -> int:
-        """
-        Count how many times a user has commented on an issue.
-
-        Args:
-            issue: Issue object
-            username: GitHub username
-
-        Returns:
-            Number of comments by the user
-        """
-        try:
-            comments = self.get_issue_comments(issue)
-            count = sum(1 for comment in comments if comment.user.login == username)
-            logger.debug(f"User {username} has {count} comments on issue #{issue.number}")
-            return count
-        except Exception as e:
-            logger.error(f"Error counting comments for {username} on issue #{issue.number}: {e}")
-            return 0
-
     def get_user_comment_history(
         self,
         repo: Repository,
@@ -246,28 +479,83 @@ class GitHubClient:
         """
         try:
             self._check_rate_limit()
+            comments = self._call(lambda: self._comment_history_graphql(repo, username, limit))
+        except Exception as e:
+            logger.warning("GraphQL comment history failed for %s, using REST: %s", repo.full_name, e)
+            with self._lock:
+                comments = self._comment_history_rest(repo, username, limit)
+
+        logger.debug("Retrieved %s comments from %s in %s", len(comments), username, repo.full_name)
+        return comments
+
+    def _comment_history_graphql(self, repo: Repository, username: str, limit: int) -> List[str]:
+        """Fetch a user's recent comments with a single GraphQL query."""
+        data = self._graphql(_COMMENT_HISTORY_QUERY, {
+            "owner": repo.owner.login,
+            "name": repo.name,
+            "count": self.COMMENT_HISTORY_ISSUES,
+        })
+        repository = data["repository"]
+
+        # Issues and PRs come back as separate lists; merge them by recency
+        threads = repository["issues"]["nodes"] + repository["pullRequests"]["nodes"]
+        threads.sort(key=lambda thread: thread["updatedAt"], reverse=True)
+
+        comments = []
+        for thread in threads[:self.COMMENT_HISTORY_ISSUES]:
+            for comment in thread["comments"]["nodes"]:
+                author = comment.get("author")
+                if author and author.get("login") == username:
+                    comments.append(comment["body"])
+                    if len(comments) >= limit:
+                        return comments
+
+        return comments
+
+    def _comment_history_rest(self, repo: Repository, username: str, limit: int) -> List[str]:
+        """Fetch a user's recent comments issue by issue over REST."""
+        try:
             comments = []
 
             # Get recent issues
             issues = repo.get_issues(state='all', sort='updated', direction='desc')
 
-            for issue in issues[:20]:  # Check last 20 issues
-                if len(comments) >= limit:
-                    break
-
-                issue_comments = self.get_issue_comments(issue)
-                for comment in issue_comments:
+            for issue in islice(issues, self.COMMENT_HISTORY_ISSUES):
+                # Iterate lazily so later comment pages are only fetched if still needed
+                for comment in issue.get_comments():
                     if comment.user.login == username:
                         comments.append(comment.body)
                         if len(comments) >= limit:
-                            break
+                            return comments
 
-            logger.debug(f"Retrieved {len(comments)} comments from {username} in {repo.full_name}")
             return comments
 
         except Exception as e:
-            logger.error(f"Error retrieving comment history for {username}: {e}")
+            logger.error("Error retrieving comment history for %s: %s", username, e)
             return []
+
+    def _graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a GitHub GraphQL query over the client's authenticated session.
+
+        Args:
+            query: GraphQL query text
+            variables: Query variables
+
+        Returns:
+            The response's "data" object
+
+        Raises:
+            GithubException: If the request fails or the response reports errors
+        """
+        _, response = self.client._Github__requester.requestJsonAndCheck(
+            "POST", "/graphql", input={"query": query, "variables": variables}
+        )
+
+        if response.get("errors"):
+            raise GithubException(200, response["errors"], None)
+
+        return response["data"]
     
     def get_user_info(self) -> Dict[str, Any]:
         """
@@ -278,15 +566,17 @@ class GitHubClient:
         """
         try:
             self._check_rate_limit()
-            return {
-                "login": self.user.login,
-                "name": self.user.name,
-                "email": self.user.email,
-                "public_repos": self.user.public_repos,
-                "followers": self.user.followers,
-            }
+            # The first attribute read completes the lazy user with a request
+            with self._lock:
+                return {
+                    "login": self.user.login,
+                    "name": self.user.name,
+                    "email": self.user.email,
+                    "public_repos": self.user.public_repos,
+                    "followers": self.user.followers,
+                }
         except GithubException as e:
-            logger.error(f"Error retrieving user info: {e}")
+            logger.error("Error retrieving user info: %s", e)
             return {}
 
     def get_repository_info(self, repo: Repository) -> Dict[str, Any]:
@@ -299,9 +589,13 @@ class GitHubClient:
         Returns:
             Dictionary with repository details
         """
+        info = self._repo_info_cache.get(repo.full_name)
+        if info is not None:
+            return dict(info)
+
         try:
             self._check_rate_limit()
-            return {
+            info = {
                 "name": repo.name,
                 "full_name": repo.full_name,
                 "owner": repo.owner.login,
@@ -310,7 +604,9 @@ class GitHubClient:
                 "open_issues": repo.open_issues_count,
                 "stars": repo.stargazers_count,
             }
+            self._repo_info_cache.set(repo.full_name, info)
+            return dict(info)
         except GithubException as e:
-            logger.error(f"Error retrieving repository info: {e}")
+            logger.error("Error retrieving repository info: %s", e)
             return {}
 
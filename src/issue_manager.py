@@ -1,12 +1,14 @@
 """
 Issue management system with intelligent assignment and AI-powered responses.
 """
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, Tuple, Any, NamedTuple
+from collections import Counter
 from datetime import datetime
 import re
 
 from github.Issue import Issue
 from github.IssueComment import IssueComment
+from github.Repository import Repository
 
 from src.github_client import GitHubClient
 from src.ai_service import AIService
@@ -16,6 +18,48 @@ from src.logger import setup_logger
 logger = setup_logger(__name__)
 
 
+class CommentEvent(NamedTuple):
+    """An issue comment as delivered by an issue_comment webhook."""
+    action: str
+    login: str
+    body: str
+    issue_number: int
+    repo_full_name: str
+    assignees: Tuple[str, ...]
+    is_bot: bool
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> Optional["CommentEvent"]:
+        """
+        Build an event from a webhook payload.
+
+        Args:
+            payload: issue_comment webhook payload
+
+        Returns:
+            CommentEvent, or None if the payload lacks the repository or issue
+        """
+        issue_data = payload.get('issue') or {}
+        comment_data = payload.get('comment') or {}
+        user_data = comment_data.get('user') or {}
+        login = user_data.get('login', '')
+        repo_full_name = (payload.get('repository') or {}).get('full_name')
+        issue_number = issue_data.get('number')
+
+        if not repo_full_name or not issue_number:
+            return None
+
+        return cls(
+            action=payload.get('action', ''),
+            login=login,
+            body=comment_data.get('body') or '',
+            issue_number=issue_number,
+            repo_full_name=repo_full_name,
+            assignees=tuple(a['login'] for a in issue_data.get('assignees') or ()),
+            is_bot=user_data.get('type') == 'Bot' or login.endswith('[bot]'),
+        )
+
+
 class IssueManager:
     """Manages issue monitoring, assignment, and responses."""
     
@@ -30,6 +74,12 @@ class IssueManager:
         r'\bi\s+can\s+work\s+on\s+this\b',
         r'\blet\s+me\s+work\s+on\s+this\b',
     ]
+
+    # All keywords in one case-insensitive pattern, so a comment is scanned once
+    _ASSIGNMENT_RE = re.compile(
+        "|".join(f"(?:{pattern})" for pattern in ASSIGNMENT_KEYWORDS),
+        re.IGNORECASE
+    )
     
     def __init__(
         self,
@@ -59,13 +109,37 @@ class IssueManager:
         Returns:
             True if comment requests assignment
         """
-        comment_lower = comment_text.lower()
-        return any(re.search(pattern, comment_lower) for pattern in self.ASSIGNMENT_KEYWORDS)
+        return self._ASSIGNMENT_RE.search(comment_text) is not None
+
+    def _scan_comments(
+        self,
+        comments: List[IssueComment]
+    ) -> Tuple[Counter, List[Tuple[str, IssueComment]]]:
+        """
+        Count comments per author and collect assignment requests in one pass.
+
+        Args:
+            comments: The issue's comments
+
+        Returns:
+            Tuple of (comment count per login, list of (username, comment) requests)
+        """
+        comment_counts = Counter()
+        assignment_requests = []
+
+        for comment in comments:
+            login = comment.user.login
+            comment_counts[login] += 1
+            if self.is_assignment_request(comment.body):
+                assignment_requests.append((login, comment))
+
+        return comment_counts, assignment_requests
     
     def analyze_assignment_candidates(
         self,
         issue: Issue,
-        assignment_requests: List[Tuple[str, IssueComment]]
+        assignment_requests: List[Tuple[str, IssueComment]],
+        comment_counts: Optional[Counter] = None
     ) -> Optional[str]:
         """
         Analyze candidates and select the best user to assign.
@@ -77,6 +151,7 @@ class IssueManager:
         Args:
             issue: Issue object
             assignment_requests: List of (username, comment) tuples
+            comment_counts: Comment count per login if already computed
         
         Returns:
             Username of selected candidate or None
@@ -84,11 +159,13 @@ class IssueManager:
         if not assignment_requests:
             return None
         
-        # Count comments for each candidate
+        if comment_counts is None:
+            comment_counts, _ = self._scan_comments(self.github.get_issue_comments(issue))
+
         candidate_scores = {}
         
         for username, request_comment in assignment_requests:
-            comment_count = self.github.get_user_comment_count(issue, username)
+            comment_count = comment_counts[username]
             request_time = request_comment.created_at
             
             candidate_scores[username] = {
@@ -97,18 +174,18 @@ class IssueManager:
                 'request_comment': request_comment
             }
         
-        # Sort by comment count (descending), then by request time (ascending)
-        sorted_candidates = sorted(
-            candidate_scores.items(),
-            key=lambda x: (-x[1]['comment_count'], x[1]['request_time'])
+        # Most comments first, then the earliest request
+        selected_username = min(
+            candidate_scores,
+            key=lambda name: (-candidate_scores[name]['comment_count'], candidate_scores[name]['request_time'])
         )
         
-        selected_username = sorted_candidates[0][0]
-        
         logger.info(
-            f"Selected {selected_username} for issue #{issue.number} "
-            f"(comments: {candidate_scores[selected_username]['comment_count']}, "
-            f"requested: {candidate_scores[selected_username]['request_time']})"
+            "Selected %s for issue #%s (comments: %s, requested: %s)",
+            selected_username,
+            issue.number,
+            candidate_scores[selected_username]['comment_count'],
+            candidate_scores[selected_username]['request_time']
         )
         
         return selected_username
@@ -165,14 +242,14 @@ class IssueManager:
     def handle_assignment_requests(
         self,
         issue: Issue,
-        new_comment: IssueComment
+        new_comment: Optional[IssueComment] = None
     ) -> bool:
         """
         Handle assignment requests on an issue.
         
         Args:
             issue: Issue object
-            new_comment: The new comment that triggered this
+            new_comment: The new comment that triggered this, if known
         
         Returns:
             True if assignment was handled
@@ -180,23 +257,18 @@ class IssueManager:
         try:
             # Check if issue is already assigned
             if issue.assignees:
-                logger.info(f"Issue #{issue.number} already assigned, skipping")
+                logger.info("Issue #%s already assigned, skipping", issue.number)
                 return False
             
-            # Get all comments
+            # Count authors and find all assignment requests in one pass
             comments = self.github.get_issue_comments(issue)
-            
-            # Find all assignment requests
-            assignment_requests = []
-            for comment in comments:
-                if self.is_assignment_request(comment.body):
-                    assignment_requests.append((comment.user.login, comment))
+            comment_counts, assignment_requests = self._scan_comments(comments)
             
             if not assignment_requests:
                 return False
             
             # Analyze and select best candidate
-            selected_user = self.analyze_assignment_candidates(issue, assignment_requests)
+            selected_user = self.analyze_assignment_candidates(issue, assignment_requests, comment_counts)
             
             if not selected_user:
                 return False
@@ -205,18 +277,20 @@ class IssueManager:
             success = self.github.assign_issue(issue, selected_user)
             
             if not success:
-                logger.error(f"Failed to assign issue #{issue.number}")
+                logger.error("Failed to assign issue #%s", issue.number)
                 return False
             
             # Send confirmation to selected user
             confirmation_msg = self.generate_assignment_confirmation(selected_user, issue)
             self.github.add_comment(issue, confirmation_msg)
             
-            # Send decline messages to other users
-            for username, _ in assignment_requests:
-                if username != selected_user:
-                    decline_msg = self.generate_decline_message(username, selected_user, issue)
-                    self.github.add_comment(issue, decline_msg)
+            # Send decline messages to other users (once each, even if they asked twice)
+            declined_users = dict.fromkeys(
+                username for username, _ in assignment_requests if username != selected_user
+            )
+            for username in declined_users:
+                decline_msg = self.generate_decline_message(username, selected_user, issue)
+                self.github.add_comment(issue, decline_msg)
             
             # Send email notification
             self.email.notify_issue_assignment(
@@ -226,11 +300,11 @@ class IssueManager:
                 issue.html_url
             )
             
-            logger.info(f"Successfully handled assignment for issue #{issue.number}")
+            logger.info("Successfully handled assignment for issue #%s", issue.number)
             return True
         
         except Exception as e:
-            logger.error(f"Error handling assignment requests for issue #{issue.number}: {e}")
+            logger.error("Error handling assignment requests for issue #%s: %s", issue.number, e)
             return False
     
     def generate_issue_context(self, issue: Issue) -> str:
@@ -257,52 +331,105 @@ class IssueManager:
         
         return "\n".join(context_parts)
     
-    def handle_comment(self, issue: Issue, comment: IssueComment) -> bool:
+    def handle_webhook_event(self, payload: Dict[str, Any]) -> bool:
         """
-        Handle a new comment on an issue with personalized AI responses.
+        Handle an issue_comment webhook straight from its payload.
+        The payload already carries the comment, so the issue's comments
+        are only fetched when an assignment has to be decided.
+
+        New comments get an AI response or, when they ask for the issue, an
+        assignment decision. Edited comments are also considered, but only
+        for assignment: editing a comment into an assignment request triggers
+        one, while other edits are ignored.
 
         Args:
-            issue: Issue object
-            comment: Comment object
+            payload: issue_comment webhook payload
 
         Returns:
             True if handled successfully
         """
+        event = CommentEvent.from_payload(payload)
+        if event is None:
+            logger.error("No repository or issue number in issue_comment payload")
+            return False
+
+        if event.action not in ('created', 'edited'):
+            logger.debug("Ignoring issue_comment action: %s", event.action)
+            return False
+
+        if event.is_bot:
+            logger.debug("Skipping bot comment on issue #%s", event.issue_number)
+            return False
+
+        is_request = self.is_assignment_request(event.body)
+
+        # An edit only matters when it turns the comment into an assignment request
+        if event.action == 'edited' and not is_request:
+            return False
+
+        if is_request and event.assignees:
+            logger.info("Issue #%s already assigned, skipping", event.issue_number)
+            return False
+
         try:
-            # Skip bot's own comments and comments from the authenticated user
-            if comment.user.login.endswith('[bot]'):
-                logger.debug(f"Skipping bot comment on issue #{issue.number}")
+            repo = self.github.get_repository(event.repo_full_name)
+            if not repo:
+                logger.error("Could not retrieve repository: %s", event.repo_full_name)
                 return False
 
-            # Check for assignment request
-            if self.is_assignment_request(comment.body):
-                return self.handle_assignment_requests(issue, comment)
+            issue = self.github.get_issue(repo, event.issue_number)
+            if not issue:
+                return False
+
+            if is_request:
+                # The cached comment list predates this comment
+                self.github.invalidate_issue_comments(issue)
+                return self.handle_assignment_requests(issue)
+
+            return self._respond_to_comment(repo, issue, event.login, event.body)
+
+        except Exception as e:
+            logger.error("Error handling comment on issue #%s: %s", event.issue_number, e)
+            return False
+
+    def _respond_to_comment(self, repo: Repository, issue: Issue, login: str, body: str) -> bool:
+        """
+        Reply to a comment with an AI response personalized to its author.
+
+        Args:
+            repo: Repository the issue belongs to
+            issue: Issue object
+            login: Comment author
+            body: Comment text
 
+        Returns:
+            True if a response was posted
+        """
+        try:
             # Get user's comment history for personalization
-            repo = issue.repository
             user_comments = self.github.get_user_comment_history(
                 repo,
-                comment.user.login,
+                login,
                 limit=10
             )
 
             # Generate personalized AI response
             issue_context = self.generate_issue_context(issue)
             ai_response = self.ai.generate_issue_response(
-                comment.body,
+                body,
                 issue_context,
                 user_comments=user_comments
             )
 
             if ai_response:
                 self.github.add_comment(issue, ai_response)
-                logger.info(f"Added personalized AI response to issue #{issue.number} for user {comment.user.login}")
+                logger.info("Added personalized AI response to issue #%s for user %s", issue.number, login)
                 return True
             else:
-                logger.warning(f"Failed to generate AI response for issue #{issue.number}")
+                logger.warning("Failed to generate AI response for issue #%s", issue.number)
                 return False
 
         except Exception as e:
-            logger.error(f"Error handling comment on issue #{issue.number}: {e}")
+            logger.error("Error handling comment on issue #%s: %s", issue.number, e)
             return False
 
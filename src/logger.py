@@ -4,14 +4,32 @@ Provides colored console logging with proper formatting.
 """
 import logging
 import sys
+from functools import lru_cache
 from typing import Optional
 import colorlog
 from src.config import Config
 
+# Shared by every logger: the level is read from config once, and one
+# formatter instance serves all handlers
+LOG_LEVEL = getattr(logging, Config.LOG_LEVEL.upper(), logging.INFO)
+FORMATTER = colorlog.ColoredFormatter(
+    "%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+    log_colors={
+        'DEBUG': 'cyan',
+        'INFO': 'green',
+        'WARNING': 'yellow',
+        'ERROR': 'red',
+        'CRITICAL': 'red,bg_white',
+    }
+)
 
+
+@lru_cache(maxsize=None)
 def setup_logger(name: Optional[str] = None) -> logging.Logger:
     """
     Set up and configure a logger with colored output.
+    Memoized, so each logger is configured exactly once.
     
     Args:
         name: Logger name (defaults to root logger)
@@ -25,28 +43,12 @@ def setup_logger(name: Optional[str] = None) -> logging.Logger:
     if logger.handlers:
         return logger
     
-    # Set log level from config
-    log_level = getattr(logging, Config.LOG_LEVEL.upper(), logging.INFO)
-    logger.setLevel(log_level)
+    logger.setLevel(LOG_LEVEL)
     
     # Create console handler with colored output
     handler = colorlog.StreamHandler(sys.stdout)
-    handler.setLevel(log_level)
-    
-    # Create formatter
-    formatter = colorlog.ColoredFormatter(
-        "%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        log_colors={
-            'DEBUG': 'cyan',
-            'INFO': 'green',
-            'WARNING': 'yellow',
-            'ERROR': 'red',
-            'CRITICAL': 'red,bg_white',
-        }
-    )
-    
-    handler.setFormatter(formatter)
+    handler.setLevel(LOG_LEVEL)
+    handler.setFormatter(FORMATTER)
     logger.addHandler(handler)
     
     return logger
@@ -1,20 +1,49 @@
 """
 Pull request management system with AI-powered responses.
 """
-from typing import Optional
+import re
+import threading
+from typing import Optional, List, Dict, Tuple
 from github.PullRequest import PullRequest
 from github.IssueComment import IssueComment
 
 from src.github_client import GitHubClient
 from src.ai_service import AIService
+from src.cache import TTLCache
 from src.email_service import EmailService
 from src.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Words that open a question even without a question mark
+_QUESTION_WORDS = frozenset({
+    'what', 'why', 'how', 'when', 'where', 'who', 'which', 'can', 'could', 'would', 'should'
+})
+
+# Comments not worth an AI reply: acknowledgements, votes, or nothing but
+# punctuation/emoji (the keyword is optional, so those match on their own)
+_TRIVIAL_RE = re.compile(
+    r"^(?:lgtm|thanks?|thank you|thx|ty|\+1|-1|:\+1:|:-1:|nice|cool|ok|okay)?[\W_]*$",
+    re.IGNORECASE
+)
+
+# A question mark anywhere, or a question word as the whole first word
+_QUESTION_RE = re.compile(
+    r"\?|^\s*(?:" + "|".join(sorted(_QUESTION_WORDS)) + r")(?!\S)",
+    re.IGNORECASE
+)
+
 
 class PRManager:
     """Manages pull request monitoring and responses."""
+
+    # Generated contexts kept for PRs whose metadata hasn't changed
+    CONTEXT_CACHE_SIZE = 256
+
+    # Seconds to wait for more comments on a PR before replying to all of them
+    COALESCE_WINDOW = 2.0
+    # Reply immediately once this many comments are waiting
+    MAX_COALESCED = 10
     
     def __init__(
         self,
@@ -33,6 +62,11 @@ class PRManager:
         self.github = github_client
         self.ai = ai_service
         self.email = email_service
+        self._context_cache = TTLCache(self.CONTEXT_CACHE_SIZE)
+        # PR API URL -> (latest PR object, comments awaiting a reply) and its flush timer
+        self._pending: Dict[str, Tuple[PullRequest, List[IssueComment]]] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._pending_lock = threading.Lock()
     
     def generate_pr_context(self, pr: PullRequest) -> str:
         """
@@ -44,30 +78,54 @@ class PRManager:
         Returns:
             Context string
         """
+        # Read the fetched JSON once instead of going through lazily completed attributes
+        data = pr.raw_data
+
         context_parts = [
-            f"Pull Request #{pr.number}: {pr.title}",
-            f"State: {pr.state}",
-            f"Base branch: {pr.base.ref}",
-            f"Head branch: {pr.head.ref}",
+            f"Pull Request #{data['number']}: {data.get('title')}",
+            f"State: {data.get('state')}",
+            f"Base branch: {data['base']['ref']}",
+            f"Head branch: {data['head']['ref']}",
         ]
         
-        if pr.body:
-            context_parts.append(f"Description: {pr.body[:500]}")
+        body = data.get('body')
+        if body:
+            context_parts.append(f"Description: {body[:500]}")
         
-        if pr.labels:
-            labels = ", ".join([label.name for label in pr.labels])
-            context_parts.append(f"Labels: {labels}")
+        labels = data.get('labels')
+        if labels:
+            label_names = ", ".join(label['name'] for label in labels)
+            context_parts.append(f"Labels: {label_names}")
         
         # Add PR stats
-        context_parts.append(f"Files changed: {pr.changed_files}")
-        context_parts.append(f"Additions: +{pr.additions}, Deletions: -{pr.deletions}")
+        context_parts.append(f"Files changed: {data.get('changed_files')}")
+        context_parts.append(f"Additions: +{data.get('additions')}, Deletions: -{data.get('deletions')}")
         
         # Add review status
-        if pr.mergeable_state:
-            context_parts.append(f"Mergeable state: {pr.mergeable_state}")
+        mergeable_state = data.get('mergeable_state')
+        if mergeable_state:
+            context_parts.append(f"Mergeable state: {mergeable_state}")
         
         return "\n".join(context_parts)
     
+    def get_pr_context(self, pr: PullRequest) -> str:
+        """
+        Get the AI context for a pull request, reusing it while the PR is unchanged.
+        A burst of comments on one PR then shares a single context string.
+
+        Args:
+            pr: PullRequest object
+
+        Returns:
+            Context string
+        """
+        key = (pr.url, pr.updated_at, pr.head.sha)
+        context = self._context_cache.get(key)
+        if context is None:
+            context = self.generate_pr_context(pr)
+            self._context_cache.set(key, context)
+        return context
+
     def is_question(self, comment_text: str) -> bool:
         """
         Check if a comment contains a question.
@@ -79,45 +137,105 @@ class PRManager:
             True if comment appears to be a question
         """
         # Simple heuristic: contains question mark or starts with question words
-        question_words = ['what', 'why', 'how', 'when', 'where', 'who', 'which', 'can', 'could', 'would', 'should']
-        
-        if '?' in comment_text:
-            return True
-        
-        first_word = comment_text.strip().split()[0].lower() if comment_text.strip() else ''
-        return first_word in question_words
+        return _QUESTION_RE.search(comment_text) is not None
     
     def handle_comment(self, pr: PullRequest, comment: IssueComment) -> bool:
         """
         Handle a new comment on a pull request with personalized AI responses.
+        Comments arriving on the same PR within COALESCE_WINDOW seconds are
+        answered together with a single AI reply.
 
         Args:
             pr: PullRequest object
             comment: Comment object
 
         Returns:
-            True if handled successfully
+            True if the comment was accepted for a response
         """
         try:
-            # Skip bot's own comments and comments from the authenticated user
-            if comment.user.login.endswith('[bot]'):
-                logger.debug(f"Skipping bot comment on PR #{pr.number}")
+            # Skip bot's own comments and comments from the authenticated user;
+            # webhook payloads already say whether the author is a bot
+            user = comment.user
+            if getattr(user, 'type', None) == 'Bot' or user.login.endswith('[bot]'):
+                logger.debug("Skipping bot comment on PR #%s", pr.number)
                 return False
 
-            # Get user's comment history for personalization
-            repo = pr.base.repo
-            user_comments = self.github.get_user_comment_history(
-                repo,
-                comment.user.login,
-                limit=10
-            )
+            # Skip the AI call (and the reply) for acknowledgements like "LGTM" or "👍"
+            if _TRIVIAL_RE.match((comment.body or '').strip()):
+                logger.debug("Skipping trivial comment on PR #%s", pr.number)
+                return False
+
+            key = pr.url
+            with self._pending_lock:
+                _, comments = self._pending.get(key, (pr, []))
+                comments.append(comment)
+                self._pending[key] = (pr, comments)
+
+                timer = self._timers.pop(key, None)
+                if timer:
+                    timer.cancel()
+
+                # A full batch is answered right away, otherwise wait for more
+                if len(comments) < self.MAX_COALESCED:
+                    # Not a daemon, so comments still waiting are answered on shutdown
+                    timer = threading.Timer(self.COALESCE_WINDOW, self._flush_comments, args=(key,))
+                    self._timers[key] = timer
+                    timer.start()
+                    return True
+
+            self._flush_comments(key)
+            return True
+
+        except Exception as e:
+            logger.error("Error handling comment on PR #%s: %s", pr.number, e)
+            return False
+
+    def _flush_comments(self, key: str):
+        """Answer the comments collected for one pull request."""
+        with self._pending_lock:
+            self._timers.pop(key, None)
+            pr, comments = self._pending.pop(key, (None, None))
+
+        if comments:
+            self._respond_to_comments(pr, comments)
+
+    def _respond_to_comments(self, pr: PullRequest, comments: List[IssueComment]) -> bool:
+        """
+        Post one AI reply to a batch of new comments on a pull request.
+
+        Args:
+            pr: PullRequest object
+            comments: New comments, oldest first
+
+        Returns:
+            True if a response was posted
+        """
+        try:
+            logins = list(dict.fromkeys(comment.user.login for comment in comments))
+
+            # Personalize only when a single user wrote everything being answered
+            user_comments = None
+            if len(logins) == 1:
+                user_comments = self.github.get_user_comment_history(
+                    pr.base.repo,
+                    logins[0],
+                    limit=10
+                )
+
+            if len(comments) == 1:
+                prompt = comments[0].body
+            else:
+                prompt = "Multiple new comments on this pull request:\n" + "\n".join(
+                    f"{i}. @{comment.user.login}: {comment.body}"
+                    for i, comment in enumerate(comments, 1)
+                )
 
             # Generate context
-            pr_context = self.generate_pr_context(pr)
+            pr_context = self.get_pr_context(pr)
 
             # Generate personalized AI response
             ai_response = self.ai.generate_pr_response(
-                comment.body,
+                prompt,
                 pr_context,
                 user_comments=user_comments
             )
@@ -127,28 +245,32 @@ class PRManager:
                 success = self.github.add_comment(pr, ai_response)
 
                 if success:
-                    logger.info(f"Added personalized AI response to PR #{pr.number} for user {comment.user.login}")
-
-                    # Send email notification if it's a question
-                    if self.is_question(comment.body):
-                        self.email.notify_pr_activity(
-                            pr.number,
-                            pr.title,
-                            "Question Asked",
-                            f"User @{comment.user.login} asked: {comment.body[:200]}...",
-                            pr.html_url
-                        )
+                    logger.info(
+                        "Added AI response to PR #%s for %s comment(s) from %s",
+                        pr.number, len(comments), ", ".join(logins)
+                    )
+
+                    # Send email notification for each question
+                    for comment in comments:
+                        if self.is_question(comment.body):
+                            self.email.notify_pr_activity(
+                                pr.number,
+                                pr.title,
+                                "Question Asked",
+                                f"User @{comment.user.login} asked: {comment.body[:200]}...",
+                                pr.html_url
+                            )
 
                     return True
                 else:
-                    logger.warning(f"Failed to add comment to PR #{pr.number}")
+                    logger.warning("Failed to add comment to PR #%s", pr.number)
                     return False
             else:
-                logger.warning(f"Failed to generate AI response for PR #{pr.number}")
+                logger.warning("Failed to generate AI response for PR #%s", pr.number)
                 return False
 
         except Exception as e:
-            logger.error(f"Error handling comment on PR #{pr.number}: {e}")
+            logger.error("Error responding to comments on PR #%s: %s", pr.number, e)
             return False
     
     def handle_pr_opened(self, pr: PullRequest) -> bool:
@@ -163,7 +285,7 @@ class PRManager:
             True if handled successfully
         """
         try:
-            logger.info(f"New PR opened: #{pr.number} - {pr.title}")
+            logger.info("New PR opened: #%s - %s", pr.number, pr.title)
 
             # Send email notification
             self.email.notify_pr_activity(
@@ -184,7 +306,7 @@ class PRManager:
             return self.github.add_comment(pr, welcome_message)
 
         except Exception as e:
-            logger.error(f"Error handling new PR #{pr.number}: {e}")
+            logger.error("Error handling new PR #%s: %s", pr.number, e)
             return False
     
     def handle_pr_review_requested(self, pr: PullRequest, reviewer: str) -> bool:
@@ -199,7 +321,7 @@ class PRManager:
             True if handled successfully
         """
         try:
-            logger.info(f"Review requested on PR #{pr.number} from @{reviewer}")
+            logger.info("Review requested on PR #%s from @%s", pr.number, reviewer)
             
             # Send email notification
             self.email.notify_pr_activity(
@@ -213,7 +335,7 @@ class PRManager:
             return True
         
         except Exception as e:
-            logger.error(f"Error handling review request on PR #{pr.number}: {e}")
+            logger.error("Error handling review request on PR #%s: %s", pr.number, e)
             return False
     
     def handle_pr_merged(self, pr: PullRequest) -> bool:
@@ -228,7 +350,7 @@ class PRManager:
             True if handled successfully
         """
         try:
-            logger.info(f"PR merged: #{pr.number} - {pr.title}")
+            logger.info("PR merged: #%s - %s", pr.number, pr.title)
 
             # Send email notification
             self.email.notify_pr_activity(
@@ -249,6 +371,6 @@ class PRManager:
             return self.github.add_comment(pr, congrats_message)
 
         except Exception as e:
-            logger.error(f"Error handling merged PR #{pr.number}: {e}")
+            logger.error("Error handling merged PR #%s: %s", pr.number, e)
             return False
 
@@ -1,12 +1,17 @@
 """
 GitHub webhook handler for processing repository events.
 """
+import atexit
 import hmac
-import hashlib
-from typing import Dict, Any, Optional
+import itertools
+import queue
+import threading
+import time
+from typing import Dict, Any, List, Tuple
 from flask import Request
 
 from src.config import Config
+from src.cache import TTLCache
 from src.github_client import GitHubClient
 from src.issue_manager import IssueManager
 from src.pr_manager import PRManager
@@ -16,7 +21,43 @@ logger = setup_logger(__name__)
 
 
 class WebhookHandler:
-    """Handles GitHub webhook events."""
+    """Handles GitHub webhook events.
+    Events are queued and processed by background workers, so a delivery is
+    acknowledged without waiting on GitHub or AI calls."""
+
+    # Event type -> name of the method handling it, resolved per call
+    _HANDLERS = {
+        'issue_comment': 'handle_issue_comment',
+        'pull_request': 'handle_pull_request',
+        'issues': 'handle_issues',
+    }
+
+    # Event types with a handler; anything else can be dropped unparsed
+    HANDLED_EVENTS = frozenset(_HANDLERS)
+
+    # Deliveries beyond this backlog are rejected rather than held in memory
+    MAX_PENDING = 2000
+    # Threads processing queued events; each owns a queue, and every event for
+    # one issue or PR goes to the same queue, so they are handled in order and
+    # never concurrently (e.g. two "assign me" comments on one issue)
+    WORKERS = 8
+
+    # Delivery IDs remembered to drop GitHub redeliveries of the same event
+    DELIVERY_CACHE_SIZE = 4096
+    DELIVERY_WINDOW = 2 * 60 * 60
+
+    # Queue priorities, lowest first: user-visible PR flows (opened, merged,
+    # review requested), then questions, then other comments, then the rest
+    PRIORITY_PR = 0
+    PRIORITY_QUESTION = 1
+    PRIORITY_COMMENT = 2
+    PRIORITY_OTHER = 3
+    _PR_ACTIONS = frozenset({'opened', 'review_requested'})
+
+    # Queued once per worker to tell it to finish and exit; sorts after every
+    # event, so the backlog is processed first
+    _STOP = object()
+    _STOP_PRIORITY = PRIORITY_OTHER + 1
     
     def __init__(
         self,
@@ -35,6 +76,26 @@ class WebhookHandler:
         self.github = github_client
         self.issue_manager = issue_manager
         self.pr_manager = pr_manager
+        # The secret never changes, so encode it once
+        self._secret_bytes = Config.GITHUB_WEBHOOK_SECRET.encode()
+
+        self._deliveries = TTLCache(self.DELIVERY_CACHE_SIZE, self.DELIVERY_WINDOW)
+        self._deliveries_lock = threading.Lock()
+
+        # (priority, sequence, event); the sequence keeps equal priorities FIFO
+        # and means payloads are never compared
+        self._queues: "List[queue.PriorityQueue[Tuple[int, int, Any]]]" = [
+            queue.PriorityQueue(maxsize=self.MAX_PENDING // self.WORKERS)
+            for _ in range(self.WORKERS)
+        ]
+        self._sequence = itertools.count()
+        self._workers = [
+            threading.Thread(target=self._work_loop, args=(work_queue,), name=f"webhook-worker-{i}", daemon=True)
+            for i, work_queue in enumerate(self._queues)
+        ]
+        for worker in self._workers:
+            worker.start()
+        atexit.register(self.close)
     
     def verify_signature(self, request: Request) -> bool:
         """
@@ -52,14 +113,9 @@ class WebhookHandler:
             logger.warning("No signature found in webhook request")
             return False
         
-        # Compute expected signature
-        secret = Config.GITHUB_WEBHOOK_SECRET.encode()
-        body = request.get_data()
-        expected_signature = 'sha256=' + hmac.new(
-            secret,
-            body,
-            hashlib.sha256
-        ).hexdigest()
+        # Compute expected signature; the body stays cached for JSON parsing
+        body = request.get_data(cache=True)
+        expected_signature = 'sha256=' + hmac.new(self._secret_bytes, body, 'sha256').hexdigest()
         
         # Compare signatures
         is_valid = hmac.compare_digest(signature, expected_signature)
@@ -69,6 +125,32 @@ class WebhookHandler:
         
         return is_valid
     
+    def is_duplicate_delivery(self, delivery_id: str) -> bool:
+        """
+        Check whether a delivery was already received, recording it if not.
+
+        Args:
+            delivery_id: Value of the X-GitHub-Delivery header
+
+        Returns:
+            True if this delivery was seen within DELIVERY_WINDOW seconds
+        """
+        with self._deliveries_lock:
+            if delivery_id in self._deliveries:
+                return True
+            self._deliveries.set(delivery_id, True)
+            return False
+
+    def forget_delivery(self, delivery_id: str):
+        """
+        Forget a recorded delivery so a redelivery is processed,
+        e.g. when the event could not be queued.
+
+        Args:
+            delivery_id: Value of the X-GitHub-Delivery header
+        """
+        self._deliveries.pop(delivery_id)
+
     def handle_issue_comment(self, payload: Dict[str, Any]) -> bool:
         """
         Handle issue_comment event from any repository.
@@ -82,64 +164,48 @@ class WebhookHandler:
         try:
             action = payload.get('action')
 
+            # Issues and PRs share the same endpoint; plain issue comments are
+            # handled from the payload itself, without refetching the comment
+            if 'pull_request' not in payload.get('issue', {}):
+                return self.issue_manager.handle_webhook_event(payload)
+
             # Only handle created comments
             if action != 'created':
-                logger.debug(f"Ignoring issue_comment action: {action}")
+                logger.debug("Ignoring issue_comment action: %s", action)
                 return False
 
-            # Get repository information
-            repo_data = payload.get('repository', {})
-            repo_full_name = repo_data.get('full_name')
-
-            if not repo_full_name:
-                logger.error("No repository information in payload")
+            # Validate the payload before any API call
+            try:
+                repo_full_name = payload['repository']['full_name']
+                issue_number = payload['issue']['number']
+                comment_data = payload['comment']
+            except (KeyError, TypeError):
+                logger.error("Missing repository, issue number or comment in payload")
                 return False
 
             # Get the repository
             repo = self.github.get_repository(repo_full_name)
             if not repo:
-                logger.error(f"Could not retrieve repository: {repo_full_name}")
-                return False
-
-            issue_data = payload.get('issue', {})
-            comment_data = payload.get('comment', {})
-
-            issue_number = issue_data.get('number')
-
-            if not issue_number:
-                logger.error("No issue number in payload")
+                logger.error("Could not retrieve repository: %s", repo_full_name)
                 return False
 
-            # Check if this is a PR (issues and PRs share the same endpoint)
-            is_pull_request = 'pull_request' in issue_data
-
-            if is_pull_request:
-                # Handle as PR comment
-                pr = self.github.get_pull_request(repo, issue_number)
-                if pr:
-                    # Create a mock comment object
-                    from types import SimpleNamespace
-                    comment = SimpleNamespace(
-                        body=comment_data.get('body', ''),
-                        user=SimpleNamespace(login=comment_data.get('user', {}).get('login', '')),
-                        created_at=comment_data.get('created_at')
-                    )
-                    return self.pr_manager.handle_comment(pr, comment)
-            else:
-                # Handle as issue comment
-                issue = self.github.get_issue(repo, issue_number)
-                if issue:
-                    # Get the actual comment object
-                    comments = self.github.get_issue_comments(issue)
-                    # Find the new comment (last one)
-                    if comments:
-                        new_comment = comments[-1]
-                        return self.issue_manager.handle_comment(issue, new_comment)
+            # Handle as PR comment
+            pr = self.github.get_pull_request(repo, issue_number)
+            if pr:
+                # Create a mock comment object
+                from types import SimpleNamespace
+                user_data = comment_data.get('user') or {}
+                comment = SimpleNamespace(
+                    body=comment_data.get('body', ''),
+                    user=SimpleNamespace(login=user_data.get('login', ''), type=user_data.get('type', 'User')),
+                    created_at=comment_data.get('created_at')
+                )
+                return self.pr_manager.handle_comment(pr, comment)
 
             return False
 
         except Exception as e:
-            logger.error(f"Error handling issue_comment event: {e}")
+            logger.error("Error handling issue_comment event: %s", e)
             return False
     
     def handle_pull_request(self, payload: Dict[str, Any]) -> bool:
@@ -155,31 +221,29 @@ class WebhookHandler:
         try:
             action = payload.get('action')
 
-            # Get repository information
-            repo_data = payload.get('repository', {})
-            repo_full_name = repo_data.get('full_name')
-
-            if not repo_full_name:
-                logger.error("No repository information in payload")
+            # Validate the payload before any API call
+            try:
+                repo_full_name = payload['repository']['full_name']
+                pr_data = payload['pull_request']
+                pr_number = pr_data['number']
+            except (KeyError, TypeError):
+                logger.error("Missing repository or PR number in payload")
                 return False
 
             # Get the repository
             repo = self.github.get_repository(repo_full_name)
             if not repo:
-                logger.error(f"Could not retrieve repository: {repo_full_name}")
+                logger.error("Could not retrieve repository: %s", repo_full_name)
                 return False
 
-            pr_data = payload.get('pull_request', {})
-            pr_number = pr_data.get('number')
-
-            if not pr_number:
-                logger.error("No PR number in payload")
-                return False
+            # The event changed the PR, so a cached copy (e.g. unmerged) is stale
+            if 'url' in pr_data:
+                self.github.invalidate_pull_request(pr_data['url'])
 
             pr = self.github.get_pull_request(repo, pr_number)
 
             if not pr:
-                logger.error(f"Could not retrieve PR #{pr_number} from {repo_full_name}")
+                logger.error("Could not retrieve PR #%s from %s", pr_number, repo_full_name)
                 return False
 
             # Handle different PR actions
@@ -187,7 +251,7 @@ class WebhookHandler:
                 return self.pr_manager.handle_pr_opened(pr)
 
             elif action == 'review_requested':
-                reviewer = payload.get('requested_reviewer', {}).get('login')
+                reviewer = (payload.get('requested_reviewer') or {}).get('login')
                 if reviewer:
                     return self.pr_manager.handle_pr_review_requested(pr, reviewer)
 
@@ -195,11 +259,11 @@ class WebhookHandler:
                 return self.pr_manager.handle_pr_merged(pr)
 
             else:
-                logger.debug(f"Ignoring pull_request action: {action}")
+                logger.debug("Ignoring pull_request action: %s", action)
                 return False
 
         except Exception as e:
-            logger.error(f"Error handling pull_request event: {e}")
+            logger.error("Error handling pull_request event: %s", e)
             return False
     
     def handle_issues(self, payload: Dict[str, Any]) -> bool:
@@ -214,24 +278,99 @@ class WebhookHandler:
         """
         try:
             action = payload.get('action')
-            issue_data = payload.get('issue', {})
-            issue_number = issue_data.get('number')
-            
-            if not issue_number:
+
+            try:
+                issue_number = payload['issue']['number']
+            except (KeyError, TypeError):
                 logger.error("No issue number in payload")
                 return False
             
             # Log issue events but don't take action
             # (we mainly respond to comments)
-            logger.info(f"Issue #{issue_number} {action}")
+            logger.info("Issue #%s %s", issue_number, action)
             
             return True
         
         except Exception as e:
-            logger.error(f"Error handling issues event: {e}")
+            logger.error("Error handling issues event: %s", e)
             return False
     
     def handle_event(self, event_type: str, payload: Dict[str, Any]) -> bool:
+        """
+        Queue a webhook event for processing by the background workers.
+        Pull request events and questions are processed ahead of other comments;
+        events for the same issue or PR are processed in arrival order.
+
+        Args:
+            event_type: GitHub event type
+            payload: Webhook payload
+
+        Returns:
+            True if queued, False if the backlog is full
+        """
+        try:
+            priority = self._priority(event_type, payload)
+            work_queue = self._queues[self._shard(payload)]
+            work_queue.put_nowait((priority, next(self._sequence), (event_type, payload)))
+            logger.info("Queued webhook event: %s", event_type)
+            return True
+        except queue.Full:
+            logger.error("Webhook queue full, rejecting event: %s", event_type)
+            return False
+
+    def close(self, timeout: float = 30.0):
+        """
+        Process queued events and stop the workers.
+
+        Args:
+            timeout: Seconds to wait for the workers to finish
+        """
+        alive = [
+            (worker, work_queue)
+            for worker, work_queue in zip(self._workers, self._queues)
+            if worker.is_alive()
+        ]
+        for _, work_queue in alive:
+            work_queue.put((self._STOP_PRIORITY, next(self._sequence), self._STOP))
+
+        deadline = time.monotonic() + timeout
+        for worker, _ in alive:
+            worker.join(max(0.0, deadline - time.monotonic()))
+
+    def _work_loop(self, work_queue: "queue.PriorityQueue[Tuple[int, int, Any]]"):
+        """Process a worker's queued events, highest priority first, until stopped."""
+        while True:
+            item = work_queue.get()[2]
+            if item is self._STOP:
+                return
+
+            event_type, payload = item
+            try:
+                self.process_event(event_type, payload)
+            except Exception as e:
+                logger.error("Error processing %s event: %s", event_type, e)
+
+    def _shard(self, payload: Dict[str, Any]) -> int:
+        """Pick the worker queue for an event from its repository and issue or PR number."""
+        repo_full_name = (payload.get('repository') or {}).get('full_name')
+        number = (payload.get('issue') or payload.get('pull_request') or {}).get('number')
+        return hash((repo_full_name, number)) % self.WORKERS
+
+    def _priority(self, event_type: str, payload: Dict[str, Any]) -> int:
+        """Rank an event for the queue; lower values are processed first."""
+        if event_type == 'pull_request':
+            action = payload.get('action')
+            # Only merges get a reply; other closes are ignored by handle_pull_request
+            merged = action == 'closed' and (payload.get('pull_request') or {}).get('merged')
+            return self.PRIORITY_PR if action in self._PR_ACTIONS or merged else self.PRIORITY_OTHER
+
+        if event_type == 'issue_comment':
+            body = (payload.get('comment') or {}).get('body') or ''
+            return self.PRIORITY_QUESTION if self.pr_manager.is_question(body) else self.PRIORITY_COMMENT
+
+        return self.PRIORITY_OTHER
+
+    def process_event(self, event_type: str, payload: Dict[str, Any]) -> bool:
         """
         Route webhook event to appropriate handler.
         
@@ -242,19 +381,13 @@ class WebhookHandler:
         Returns:
             True if handled successfully
         """
-        logger.info(f"Received webhook event: {event_type}")
-        
-        handlers = {
-            'issue_comment': self.handle_issue_comment,
-            'pull_request': self.handle_pull_request,
-            'issues': self.handle_issues,
-        }
+        logger.info("Processing webhook event: %s", event_type)
         
-        handler = handlers.get(event_type)
+        handler_name = self._HANDLERS.get(event_type)
         
-        if handler:
-            return handler(payload)
+        if handler_name:
+            return getattr(self, handler_name)(payload)
         else:
-            logger.debug(f"No handler for event type: {event_type}")
+            logger.debug("No handler for event type: %s", event_type)
             return False
 
@@ -3,8 +3,11 @@
 Local testing script for GitHub Manager.
 Tests basic functionality without deploying to Heroku.
 """
+import io
 import sys
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -22,6 +25,30 @@ from src.email_service import EmailService
 logger = setup_logger(__name__)
 
 
+class ThreadOutput(io.TextIOBase):
+    """Stdout stand-in that gives each capturing thread its own buffer,
+    so tests running in parallel don't interleave their output."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer or self._stream).write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def capture(self, test):
+        """Run a test, returning its result and everything it printed."""
+        self._local.buffer = io.StringIO()
+        try:
+            return test(), self._local.buffer.getvalue()
+        finally:
+            self._local.buffer = None
+
+
 def test_configuration():
     """Test configuration validation."""
     print("\n" + "="*60)
@@ -173,14 +200,28 @@ def main():
     """Run all tests."""
     print("\n" + "🧪 GitHub Manager - Local Testing Suite" + "\n")
     
-    results = {
-        "Configuration": test_configuration(),
-        "GitHub Connection": test_github_connection(),
-        "AI Service": test_ai_service(),
-        "Email Service": test_email_service(),
-        "Assignment Detection": test_assignment_detection(),
+    tests = {
+        "Configuration": test_configuration,
+        "GitHub Connection": test_github_connection,
+        "AI Service": test_ai_service,
+        "Email Service": test_email_service,
+        "Assignment Detection": test_assignment_detection,
     }
     
+    # The tests are independent network checks; run them together and print
+    # each one's output as a block, in order
+    output = ThreadOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            futures = {name: executor.submit(output.capture, test) for name, test in tests.items()}
+            results = {}
+            for name, future in futures.items():
+                results[name], printed = future.result()
+                print(printed, end="")
+    finally:
+        sys.stdout = output._stream
+    
     # Summary
     print("\n" + "="*60)
     print("Test Summary")
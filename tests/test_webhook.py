@@ -0,0 +1,90 @@
+"""
+Tests for the webhook endpoint.
+Run with: python -m unittest discover tests
+"""
+import hashlib
+import hmac
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+
+
+def _import_app():
+    """Import app.py with GitHub access and config validation stubbed out."""
+    github_client = mock.MagicMock()
+    github_client.get_user_info.return_value = {"login": "tester"}
+    github_client.get_all_public_repositories.return_value = []
+
+    with mock.patch.object(Config, "validate", return_value=(True, [])), \
+            mock.patch("src.github_client.GitHubClient", return_value=github_client):
+        import app
+    return app
+
+
+class WebhookPayloadLimitTest(unittest.TestCase):
+    """Oversized webhook bodies are rejected before any processing."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app_module = _import_app()
+        cls.client = cls.app_module.app.test_client()
+
+    def test_oversized_body_returns_413(self):
+        limit = self.app_module.app.config["MAX_CONTENT_LENGTH"]
+
+        with mock.patch.object(self.app_module.email_service, "notify_error") as notify_error:
+            response = self.client.post(
+                "/webhook",
+                data=b"x" * (limit + 1),
+                headers={
+                    "X-Hub-Signature-256": "sha256=0",
+                    "X-GitHub-Event": "issues",
+                    "X-GitHub-Delivery": "oversized-delivery",
+                },
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.get_json(), {"error": "Payload too large"})
+        notify_error.assert_not_called()
+
+
+class WebhookRateLimitTest(unittest.TestCase):
+    """Only signed deliveries count against a hook's rate limit."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app_module = _import_app()
+        cls.client = cls.app_module.app.test_client()
+
+    def _post(self, signature, hook_id):
+        return self.client.post(
+            "/webhook",
+            data=b"{}",
+            headers={
+                "X-Hub-Signature-256": signature,
+                "X-GitHub-Event": "ping",
+                "X-GitHub-Hook-ID": hook_id,
+            },
+            content_type="application/json",
+        )
+
+    def test_unsigned_requests_do_not_use_up_the_limit(self):
+        hook_id = "unsigned-flood"
+        limit = int(self.app_module.Config.WEBHOOK_RATE_LIMIT.split("/")[0])
+
+        for _ in range(limit + 5):
+            self.assertEqual(self._post("sha256=0", hook_id).status_code, 401)
+
+        secret = self.app_module.webhook_handler._secret_bytes
+        signature = "sha256=" + hmac.new(secret, b"{}", hashlib.sha256).hexdigest()
+        self.assertEqual(self._post(signature, hook_id).status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()